@@ -4,26 +4,308 @@ VCH-001 Data Loader
 Loads and validates datasets for redshift decomposition analysis
 """
 
+import hashlib
+import io
+import logging
+import mmap
+import os
+import re
+import sys
+import threading
 import numpy as np
 import pandas as pd
+from astropy import units as u
+from astropy.cosmology import Planck18
 from pathlib import Path
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = pc = pa_csv = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler bound to the current sys.stdout, so redirect_stdout still captures it"""
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass
+
+def get_logger(name):
+    """Return a logger that writes bare messages to stdout (configured once)"""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+logger = get_logger(__name__)
+
+# Normalization patterns for feeding whitespace tables to pyarrow, whose CSV
+# reader only accepts a single-character delimiter
+_COMMENT_RE = re.compile(rb'#[^\n]*')
+_WHITESPACE_RUN_RE = re.compile(rb'[ \t\r]+')
+_LINE_EDGE_RE = re.compile(rb'^ | $', re.MULTILINE)
+
+# Bump whenever parsing/post-processing changes so stale caches are ignored
+CACHE_VERSION = 4
+
+# Pantheon+ columns consumed by the VCH analyses, with explicit dtypes so
+# unused columns are never parsed and no type inference is needed
+PANTHEON_DTYPES = {
+    'CID': 'string',
+    'zCMB': 'float32',
+    'MU_SH0ES': 'float32',
+    'MU_SH0ES_ERR_DIAG': 'float32',
+    'RA': 'float32',
+    'DEC': 'float32',
+}
+
+# VoidFinder maximal-sphere table (Douglass+ 2023) layout and the subset of
+# columns used downstream
+VOIDFINDER_COLUMNS = ['Cosmology', 'x_hMpc', 'y_hMpc', 'z_hMpc', 'radius_hMpc',
+                      'void_id', 'edge_flag', 'comoving_dist_hMpc', 'RA_deg', 'Dec_deg', 'Reff_hMpc']
+VOIDFINDER_DTYPES = {
+    'Cosmology': 'category',
+    'radius_hMpc': 'float32',
+    'void_id': 'int32',
+    'edge_flag': 'int8',
+    'comoving_dist_hMpc': 'float32',
+    'RA_deg': 'float32',
+    'Dec_deg': 'float32',
+}
+
+# Planck18 comoving distance (h^-1 Mpc) on a redshift grid, inverted by
+# interpolation to assign void redshifts
+_Z_GRID = np.linspace(0.0, 0.3, 4096)
+_DC_GRID_HMPC = Planck18.comoving_distance(_Z_GRID).to(u.Mpc).value * Planck18.h
+
+def _read_whitespace_table(path, names=None, comment='#', row_filter=None, dtype=None):
+    """Read a whitespace-separated table, using pyarrow when available
+    
+    row_filter is an optional (column, value) pair; only matching rows are
+    kept, and with pyarrow they are dropped before any pandas conversion.
+    dtype maps column -> dtype; when given, only those columns are read
+    (columns absent from the file are skipped).
+    """
+    if pa_csv is None:
+        usecols = (lambda c: c in dtype) if dtype else None
+        df = pd.read_csv(path, sep=r'\s+', names=names, comment=comment,
+                         usecols=usecols, dtype=dtype, engine='c', low_memory=False,
+                         memory_map=True)
+        if row_filter is not None:
+            column, value = row_filter
+            df = df[df[column] == value]
+        return df
+    
+    # Normalize straight from a read-only mapping of the file so the raw
+    # bytes are demand-paged rather than copied into a buffer first
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = _COMMENT_RE.sub(b'', mm) if comment else mm
+        text = _WHITESPACE_RUN_RE.sub(b' ', text)
+    text = _LINE_EDGE_RE.sub(b'', text)
+    
+    read_options = pa_csv.ReadOptions(column_names=names) if names else pa_csv.ReadOptions()
+    convert_options = pa_csv.ConvertOptions()
+    if dtype:
+        # Header is the first non-empty line: stripped comment lines are left blank
+        available = names or text.lstrip(b'\n').split(b'\n', 1)[0].decode().split(' ')
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=[c for c in available if c in dtype],
+            column_types={c: _arrow_type(t) for c, t in dtype.items()})
+    
+    table = pa_csv.read_csv(io.BytesIO(text), read_options=read_options,
+                            parse_options=pa_csv.ParseOptions(delimiter=' '),
+                            convert_options=convert_options)
+    if row_filter is not None:
+        column, value = row_filter
+        table = table.filter(pc.equal(table[column], value))
+    
+    df = table.to_pandas()
+    if dtype:
+        df = df.astype({c: t for c, t in dtype.items() if c in df.columns})
+    return df
+
+def _arrow_type(dtype):
+    """Map a pandas dtype string to the pyarrow type used while parsing"""
+    if dtype in ('string', 'category'):
+        # Categories are applied after the row filter, on the pandas side
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def _downcast_numeric(df):
+    """Downcast float/int columns to the narrowest dtype that holds them"""
+    for col in df.select_dtypes('float').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in df.select_dtypes('integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def _print_file_head(path, label, n_lines=5):
+    """Print the first few lines of a file to help diagnose its format"""
+    # islice bounds the read regardless of file size
+    with open(path, 'r', buffering=1 << 20) as f:
+        head = [line.strip() for line in islice(f, n_lines)]
+    logger.info('\n'.join([f"First {n_lines} lines of {label}:", *(f"  {line}" for line in head)]))
+
+if njit is not None:
+    @njit('f8[::1](f8[::1], f8[::1], f8[::1])', cache=True, parallel=True)
+    def _interp_monotonic(x, xp, fp):
+        """np.interp equivalent for increasing xp: binary search + linear interp"""
+        n = xp.shape[0]
+        out = np.empty(x.shape[0], dtype=np.float64)
+        for i in prange(x.shape[0]):
+            v = x[i]
+            if v != v:
+                out[i] = np.nan
+            elif v <= xp[0]:
+                out[i] = fp[0]
+            elif v >= xp[n - 1]:
+                out[i] = fp[n - 1]
+            else:
+                lo = 0
+                hi = n - 1
+                while hi - lo > 1:
+                    mid = (lo + hi) >> 1
+                    if xp[mid] <= v:
+                        lo = mid
+                    else:
+                        hi = mid
+                t = (v - xp[lo]) / (xp[hi] - xp[lo])
+                out[i] = fp[lo] + t * (fp[hi] - fp[lo])
+        return out
+
+def comoving_distance_to_redshift(d_hmpc):
+    """Convert comoving distances in h^-1 Mpc to Planck18 redshifts"""
+    if njit is None:
+        return np.interp(d_hmpc, _DC_GRID_HMPC, _Z_GRID)
+    d_hmpc = np.ascontiguousarray(d_hmpc, dtype=np.float64)
+    return _interp_monotonic(d_hmpc, _DC_GRID_HMPC, _Z_GRID)
+
+def _read_voidfinder_voids(void_file):
+    """VoidFinder maximal spheres (Douglass+ 2023), Planck2018 rows only"""
+    # Based on ReadMe: Cosmo x y z Rad void edge s RAdeg DEdeg Reff
+    df = _read_whitespace_table(void_file, names=VOIDFINDER_COLUMNS,
+                                row_filter=('Cosmology', 'Planck2018'),
+                                dtype=VOIDFINDER_DTYPES)
+    
+    # Convert comoving distance to redshift by inverting the Planck18
+    # D_C(z) table (the linear Hubble law d = cz/H0 biases z > ~0.05)
+    df['redshift'] = comoving_distance_to_redshift(df['comoving_dist_hMpc'].to_numpy()).astype(np.float32)
+    
+    logger.info(f"Loaded {len(df)} VoidFinder voids (Planck2018 cosmology)")
+    return df
+
+def _read_v2_voids(void_file):
+    """V2/VIDE voids - more complex, would need ReadMe for exact format"""
+    df = _downcast_numeric(_read_whitespace_table(void_file))
+    logger.info(f"Loaded {len(df)} V2/VIDE voids")
+    return df
+
+def _read_tsv_voids(void_file):
+    """TSV/CSV catalog with tab separator"""
+    df = _downcast_numeric(pd.read_csv(void_file, sep='\t', comment='#', skiprows=20))
+    logger.info(f"Loaded {len(df)} voids from TSV catalog")
+    return df
+
+def _read_standard_voids(void_file):
+    """Standard whitespace-separated format (test catalog)"""
+    df = _downcast_numeric(_read_whitespace_table(void_file))
+    logger.info(f"Loaded {len(df)} voids from standard catalog")
+    return df
+
+
+def read_feather_cache(cache_file):
+    """Read a Feather cache file, or None if it is missing or unreadable (the file is then removed)"""
+    if not cache_file.exists():
+        return None
+    try:
+        return pd.read_feather(cache_file)
+    except Exception as e:
+        # Truncated by an interrupted write, or removed by another process meanwhile
+        warnings.warn(f"Discarding unreadable cache {cache_file}: {e}")
+        cache_file.unlink(missing_ok=True)
+        return None
+
+def write_feather_cache(df, cache_file):
+    """Write df as lz4 Feather via a temporary file renamed into place, so readers never see a partial file"""
+    # Unique per process and thread, and created with the usual umask-derived permissions
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        df.to_feather(tmp_file, compression='lz4')
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        warnings.warn(f"Could not write cache {cache_file}: {e}")
+        tmp_file.unlink(missing_ok=True)
 
 class VCH001DataLoader:
     """Load and validate VCH-001 datasets"""
     
+    # Void catalog readers keyed by filename or extension
+    VOID_FORMATS = {
+        'table1.dat': _read_voidfinder_voids,
+        'table3.dat': _read_v2_voids,
+        '.tsv': _read_tsv_voids,
+        '.csv': _read_tsv_voids,
+    }
+    
     def __init__(self, data_root="../../datasets"):
         self.data_root = Path(data_root)
         self.pantheon_path = self.data_root / "pantheon"
         self.vide_path = self.data_root / "vide"
         self.processed_path = self.data_root / "processed"
         
-        # Ensure processed directory exists
-        self.processed_path.mkdir(parents=True, exist_ok=True)
+        self.cache_path = self.processed_path / "cache"
+        
+        # Ensure processed and cache directories exist
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        
+        # Loaded catalogs are memoized per loader instance
+        self._pantheon_df = None
+        self._void_df = None
+    
+    def _cached_read(self, source_file, read_func):
+        """Return read_func() output, cached as Feather keyed by source mtime+size"""
+        if pa_csv is None:
+            # Feather requires pyarrow
+            return read_func()
+        
+        st = source_file.stat()
+        key_src = f"{source_file.resolve()}|{st.st_mtime_ns}|{st.st_size}|v{CACHE_VERSION}"
+        key = hashlib.blake2b(key_src.encode()).hexdigest()[:16]
+        cache_file = self.cache_path / f"{key}.feather"
+        
+        df = read_feather_cache(cache_file)
+        if df is not None:
+            logger.info(f"Loaded {len(df)} rows from cache ({cache_file.name})")
+            return df
+        
+        df = read_func().reset_index(drop=True)
+        write_feather_cache(df, cache_file)
+        return df
     
     def load_pantheon(self):
-        """Load Pantheon+ supernova catalog"""
-        print("Loading Pantheon+ catalog...")
+        """Load Pantheon+ supernova catalog (memoized per loader)"""
+        if self._pantheon_df is not None:
+            return self._pantheon_df
+        
+        logger.info("Loading Pantheon+ catalog...")
         
         # Try DataRelease structure first (correct path)
         pantheon_file = self.pantheon_path / "DataRelease/Pantheon+_Data/4_DISTANCES_AND_COVAR/Pantheon+SH0ES.dat"
@@ -36,35 +318,36 @@ class VCH001DataLoader:
         
         # Load with appropriate column names (based on Pantheon+ documentation)
         try:
-            df = pd.read_csv(pantheon_file, sep=r'\s+', comment='#')
-            print(f"Loaded {len(df)} supernovae from Pantheon+")
+            df = self._cached_read(pantheon_file,
+                                   lambda: _read_whitespace_table(pantheon_file, dtype=PANTHEON_DTYPES))
+            logger.info(f"Loaded {len(df)} supernovae from Pantheon+")
             
             # Basic validation - adjust for actual Pantheon+ column names
             required_cols = ['CID', 'zCMB', 'MU_SH0ES', 'MU_SH0ES_ERR_DIAG']
             missing_cols = [col for col in required_cols if col not in df.columns]
             if missing_cols:
-                print(f"Warning: Missing expected columns: {missing_cols}")
-                print(f"Available columns: {list(df.columns)}")
+                logger.warning('\n'.join([
+                    f"Warning: Missing expected columns: {missing_cols}",
+                    f"Available columns: {list(df.columns)}",
+                ]))
             else:
-                print("✅ All required columns present")
+                logger.info("✅ All required columns present")
             
+            self._pantheon_df = df
             return df
             
         except Exception as e:
-            print(f"Error loading Pantheon+ data: {e}")
+            logger.error(f"Error loading Pantheon+ data: {e}")
             # Try to read first few lines to diagnose format
-            with open(pantheon_file, 'r') as f:
-                print("First 5 lines of file:")
-                for i, line in enumerate(f):
-                    if i < 5:
-                        print(f"  {line.strip()}")
-                    else:
-                        break
+            _print_file_head(pantheon_file, "file")
             raise
     
     def load_vide_voids(self):
-        """Load VIDE void catalog"""
-        print("Loading VIDE void catalog...")
+        """Load VIDE void catalog (memoized per loader)"""
+        if self._void_df is not None:
+            return self._void_df
+        
+        logger.info("Loading VIDE void catalog...")
         
         # Try multiple void catalog sources (real catalogs first)
         void_files = [
@@ -83,93 +366,83 @@ class VCH001DataLoader:
         if void_file is None:
             raise FileNotFoundError(f"No void catalog found. Tried: {[str(vf) for vf in void_files]}")
         
-        print(f"Using void catalog: {void_file}")
+        logger.info(f"Using void catalog: {void_file}")
         try:
-            # Handle different catalog formats
-            if 'table1.dat' in str(void_file):
-                # VoidFinder maximal spheres format (Douglass+ 2023)
-                # Based on ReadMe: Cosmo x y z Rad void edge s RAdeg DEdeg Reff
-                column_names = ['Cosmology', 'x_hMpc', 'y_hMpc', 'z_hMpc', 'radius_hMpc', 
-                               'void_id', 'edge_flag', 'comoving_dist_hMpc', 'RA_deg', 'Dec_deg', 'Reff_hMpc']
-                df = pd.read_csv(void_file, sep=r'\s+', names=column_names, comment='#')
-                # Filter for Planck2018 cosmology and valid voids
-                df = df[df['Cosmology'] == 'Planck2018'].copy()
-                
-                # Convert comoving distance to redshift (approximate for low z)
-                # Using Hubble's law: d = c*z/H0, assuming H0 = 100 h km/s/Mpc
-                # So z ≈ d * 100 h / c = d_hMpc * 100 / 299792.458 
-                c_km_s = 299792.458  # km/s
-                df['redshift'] = df['comoving_dist_hMpc'] * 100 / c_km_s
-                
-                print(f"Loaded {len(df)} VoidFinder voids (Planck2018 cosmology)")
-                
-            elif 'table3.dat' in str(void_file):
-                # V2/VIDE format - more complex, would need ReadMe for exact format
-                df = pd.read_csv(void_file, sep=r'\s+', comment='#')
-                print(f"Loaded {len(df)} V2/VIDE voids")
-                
-            elif 'csv' in str(void_file) or 'tsv' in str(void_file):
-                # TSV/CSV format with tab separator
-                df = pd.read_csv(void_file, sep='\t', comment='#', skiprows=20)
-                print(f"Loaded {len(df)} voids from TSV catalog")
-                
-            else:
-                # Standard whitespace-separated format (test catalog)
-                df = pd.read_csv(void_file, sep=r'\s+', comment='#')
-                print(f"Loaded {len(df)} voids from standard catalog")
-            
-            print(f"Columns: {list(df.columns)}")
+            df = self._cached_read(void_file, lambda: self._parse_void_catalog(void_file))
+            logger.info(f"Columns: {list(df.columns)}")
+            self._void_df = df
             return df
             
         except Exception as e:
-            print(f"Error loading VIDE data: {e}")
+            logger.error(f"Error loading VIDE data: {e}")
             # Diagnose format
-            with open(void_file, 'r') as f:
-                print("First 5 lines of void catalog:")
-                for i, line in enumerate(f):
-                    if i < 5:
-                        print(f"  {line.strip()}")
-                    else:
-                        break
+            _print_file_head(void_file, "void catalog")
             raise
     
+    def _parse_void_catalog(self, void_file):
+        """Parse a void catalog file with the reader registered for its format"""
+        # Exact filename first, then extension, then the plain whitespace table
+        reader = self.VOID_FORMATS.get(void_file.name) or self.VOID_FORMATS.get(void_file.suffix)
+        return (reader or _read_standard_voids)(void_file)
+    
+    @classmethod
+    def register_void_format(cls, key, reader):
+        """Register a reader for a void catalog filename or extension"""
+        cls.VOID_FORMATS = {**cls.VOID_FORMATS, key: reader}
+    
+    def load_catalogs(self):
+        """Load the Pantheon+ and void catalogs concurrently"""
+        # Independent files: overlap their I/O and parsing (both release the GIL)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            sn_future = executor.submit(self.load_pantheon)
+            void_future = executor.submit(self.load_vide_voids)
+            return sn_future.result(), void_future.result()
+    
     def validate_datasets(self):
         """Validate loaded datasets and report statistics"""
-        print("\n" + "="*50)
-        print("DATASET VALIDATION REPORT")
-        print("="*50)
+        logger.info('\n'.join([
+            "\n" + "="*50,
+            "DATASET VALIDATION REPORT",
+            "="*50,
+        ]))
         
         try:
             # Load datasets
-            sn_df = self.load_pantheon()
-            void_df = self.load_vide_voids()
+            sn_df, void_df = self.load_catalogs()
             
             # Pantheon+ validation
-            print(f"\nPANTHEON+ CATALOG:")
-            print(f"  Total supernovae: {len(sn_df)}")
+            logger.info('\n'.join([
+                f"\nPANTHEON+ CATALOG:",
+                f"  Total supernovae: {len(sn_df)}",
+            ]))
             if 'zCMB' in sn_df.columns:
-                print(f"  Redshift range: {sn_df['zCMB'].min():.3f} - {sn_df['zCMB'].max():.3f}")
-                print(f"  SNe in analysis range (0.01 < z < 0.15): {len(sn_df[(sn_df['zCMB'] > 0.01) & (sn_df['zCMB'] < 0.15)])}")
+                logger.info('\n'.join([
+                    f"  Redshift range: {sn_df['zCMB'].min():.3f} - {sn_df['zCMB'].max():.3f}",
+                    f"  SNe in analysis range (0.01 < z < 0.15): {len(sn_df[(sn_df['zCMB'] > 0.01) & (sn_df['zCMB'] < 0.15)])}",
+                ]))
             
             # Check for coordinates
-            coord_cols = ['RA', 'DEC', 'ra', 'dec']
-            has_coords = any(col in sn_df.columns for col in coord_cols)
-            print(f"  Has coordinates: {has_coords}")
+            sn_cols = {col.lower() for col in sn_df.columns}
+            has_coords = bool(sn_cols & {'ra', 'dec'})
+            logger.info(f"  Has coordinates: {has_coords}")
             
             # VIDE validation  
-            print(f"\nVIDE VOID CATALOG:")
-            print(f"  Total voids: {len(void_df)}")
+            logger.info('\n'.join([
+                f"\nVIDE VOID CATALOG:",
+                f"  Total voids: {len(void_df)}",
+            ]))
             
             # Try to identify coordinate columns
-            possible_coords = [col for col in void_df.columns if any(x in col.lower() for x in ['ra', 'dec', 'x', 'y', 'z'])]
-            print(f"  Possible coordinate columns: {possible_coords}")
+            coord_stems = {'ra', 'dec', 'x', 'y', 'z'}
+            possible_coords = [col for col in void_df.columns if col.lower().split('_')[0] in coord_stems]
+            logger.info(f"  Possible coordinate columns: {possible_coords}")
             
             # Summary
-            print(f"\n✅ Data loading successful!")
+            logger.info(f"\n✅ Data loading successful!")
             return True
             
         except Exception as e:
-            print(f"\n❌ Data validation failed: {e}")
+            logger.error(f"\n❌ Data validation failed: {e}")
             return False
 
 if __name__ == "__main__":
@@ -178,6 +451,6 @@ if __name__ == "__main__":
     success = loader.validate_datasets()
     
     if success:
-        print(f"\n🎉 Ready to proceed with VCH-001 analysis!")
+        logger.info(f"\n🎉 Ready to proceed with VCH-001 analysis!")
     else:
-        print(f"\n⚠️  Please check data downloads and try again.")
\ No newline at end of file
+        logger.info(f"\n⚠️  Please check data downloads and try again.")
\ No newline at end of file
@@ -6,223 +6,313 @@ Sample and validate datasets before correlation analysis
 
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Plots are only written to disk
 import matplotlib.pyplot as plt
-from data_loader import VCH001DataLoader
+from data_loader import VCH001DataLoader, get_logger
 from pathlib import Path
 
+logger = get_logger(__name__)
+
+# Redshift range used by the VCH-001 correlation analysis
+ANALYSIS_Z_MIN = 0.01
+ANALYSIS_Z_MAX = 0.15
+
+def _analysis_mask(z):
+    """Boolean mask for redshifts inside the analysis range (two boolean arrays, no float copies)"""
+    z = np.asarray(z)
+    mask = np.greater_equal(z, ANALYSIS_Z_MIN)
+    np.logical_and(mask, np.less_equal(z, ANALYSIS_Z_MAX), out=mask)
+    return mask
+
+def _stairs_hist(ax, values, bins, **kwargs):
+    """Histogram binned in numpy and drawn as a single stairs artist"""
+    values = np.asarray(values, dtype=float)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    return ax.stairs(counts, edges, fill=True, **kwargs)
+
+def _column_summary(df, columns):
+    """Min/max/mean/std/median/quartiles/missing counts for several columns at once"""
+    subset = df[columns]
+    summary = subset.agg(['min', 'max', 'mean', 'std', 'median'])
+    quartiles = subset.quantile([0.25, 0.75])
+    quartiles.index = ['q25', 'q75']
+    missing = subset.isna().sum().to_frame('n_missing').T
+    return pd.concat([summary, quartiles, missing])
+
 class VCH001DataValidator:
     """Validate and sample VCH-001 datasets"""
     
-    def __init__(self):
-        self.loader = VCH001DataLoader()
+    def __init__(self, loader=None):
+        # Share a loader to reuse catalogs it has already parsed
+        self.loader = loader if loader is not None else VCH001DataLoader()
+        
+        # Analysis-range masks/samples, computed once by the validate_* methods
+        self._sn_mask = None
+        self._void_mask = None
+        self.sn_analysis = None
+        self.void_analysis = None
         
-    def validate_pantheon_data(self):
+    def validate_pantheon_data(self, sn_df=None):
         """Sample and validate Pantheon+ supernova data"""
-        print("="*60)
-        print("PANTHEON+ SUPERNOVA DATA VALIDATION")
-        print("="*60)
+        logger.info('\n'.join([
+            "="*60,
+            "PANTHEON+ SUPERNOVA DATA VALIDATION",
+            "="*60,
+        ]))
         
-        # Load data
-        sn_df = self.loader.load_pantheon()
+        # Load data (unless already provided)
+        if sn_df is None:
+            sn_df = self.loader.load_pantheon()
         
         # Basic statistics
-        print(f"\n📊 BASIC STATISTICS:")
-        print(f"  Total supernovae: {len(sn_df)}")
-        print(f"  Redshift range: {sn_df['zCMB'].min():.4f} - {sn_df['zCMB'].max():.4f}")
-        print(f"  Distance modulus range: {sn_df['MU_SH0ES'].min():.2f} - {sn_df['MU_SH0ES'].max():.2f}")
+        stats = _column_summary(sn_df, ['zCMB', 'MU_SH0ES', 'RA', 'DEC'])
+        logger.info('\n'.join([
+            f"\n📊 BASIC STATISTICS:",
+            f"  Total supernovae: {len(sn_df)}",
+            f"  Redshift range: {stats.at['min', 'zCMB']:.4f} - {stats.at['max', 'zCMB']:.4f}",
+            f"  Distance modulus range: {stats.at['min', 'MU_SH0ES']:.2f} - {stats.at['max', 'MU_SH0ES']:.2f}",
+        ]))
         
         # Analysis sample
-        analysis_mask = (sn_df['zCMB'] >= 0.01) & (sn_df['zCMB'] <= 0.15)
-        analysis_df = sn_df[analysis_mask].copy()
-        print(f"  Analysis sample (0.01 < z < 0.15): {len(analysis_df)} SNe")
+        self._sn_mask = _analysis_mask(sn_df['zCMB'].to_numpy())
+        analysis_df = sn_df.loc[self._sn_mask]
+        self.sn_analysis = analysis_df
+        logger.info(f"  Analysis sample (0.01 < z < 0.15): {len(analysis_df)} SNe")
         
         # Coordinate coverage
-        print(f"\n📍 COORDINATE COVERAGE:")
-        print(f"  RA range: {sn_df['RA'].min():.1f}° - {sn_df['RA'].max():.1f}°")
-        print(f"  Dec range: {sn_df['DEC'].min():.1f}° - {sn_df['DEC'].max():.1f}°")
+        logger.info('\n'.join([
+            f"\n📍 COORDINATE COVERAGE:",
+            f"  RA range: {stats.at['min', 'RA']:.1f}° - {stats.at['max', 'RA']:.1f}°",
+            f"  Dec range: {stats.at['min', 'DEC']:.1f}° - {stats.at['max', 'DEC']:.1f}°",
+        ]))
         
         # Data quality checks
-        print(f"\n🔍 DATA QUALITY:")
+        logger.info(f"\n🔍 DATA QUALITY:")
         missing_coords = sn_df[['RA', 'DEC']].isna().any(axis=1).sum()
-        missing_z = sn_df['zCMB'].isna().sum()
-        missing_mu = sn_df['MU_SH0ES'].isna().sum()
-        print(f"  Missing coordinates: {missing_coords}")
-        print(f"  Missing redshifts: {missing_z}")
-        print(f"  Missing distance moduli: {missing_mu}")
+        missing_z = int(stats.at['n_missing', 'zCMB'])
+        missing_mu = int(stats.at['n_missing', 'MU_SH0ES'])
+        logger.info('\n'.join([
+            f"  Missing coordinates: {missing_coords}",
+            f"  Missing redshifts: {missing_z}",
+            f"  Missing distance moduli: {missing_mu}",
+        ]))
         
         # Sample entries
-        print(f"\n📝 SAMPLE ENTRIES (Analysis Range):")
+        logger.info(f"\n📝 SAMPLE ENTRIES (Analysis Range):")
         sample_cols = ['CID', 'RA', 'DEC', 'zCMB', 'MU_SH0ES', 'MU_SH0ES_ERR_DIAG']
-        print(analysis_df[sample_cols].head(10).to_string(index=False))
+        logger.info(analysis_df[sample_cols].head(10).to_string(index=False))
         
         # Uncertainty distribution
-        print(f"\n📈 UNCERTAINTY STATISTICS:")
-        print(f"  Distance modulus uncertainty (median): {analysis_df['MU_SH0ES_ERR_DIAG'].median():.3f}")
-        print(f"  Distance modulus uncertainty (mean): {analysis_df['MU_SH0ES_ERR_DIAG'].mean():.3f}")
-        print(f"  Distance modulus uncertainty (std): {analysis_df['MU_SH0ES_ERR_DIAG'].std():.3f}")
+        err_stats = analysis_df['MU_SH0ES_ERR_DIAG'].agg(['median', 'mean', 'std'])
+        logger.info('\n'.join([
+            f"\n📈 UNCERTAINTY STATISTICS:",
+            f"  Distance modulus uncertainty (median): {err_stats['median']:.3f}",
+            f"  Distance modulus uncertainty (mean): {err_stats['mean']:.3f}",
+            f"  Distance modulus uncertainty (std): {err_stats['std']:.3f}",
+        ]))
         
         return analysis_df
     
-    def validate_void_data(self):
+    def validate_void_data(self, void_df=None):
         """Sample and validate VoidFinder void catalog"""
-        print("\n" + "="*60)
-        print("VOIDFINDER VOID CATALOG VALIDATION")
-        print("="*60)
+        logger.info('\n'.join([
+            "\n" + "="*60,
+            "VOIDFINDER VOID CATALOG VALIDATION",
+            "="*60,
+        ]))
         
-        # Load data
-        void_df = self.loader.load_vide_voids()
+        # Load data (unless already provided)
+        if void_df is None:
+            void_df = self.loader.load_vide_voids()
         
-        # Basic statistics
-        print(f"\n📊 BASIC STATISTICS:")
-        print(f"  Total voids: {len(void_df)}")
-        print(f"  Redshift range: {void_df['redshift'].min():.4f} - {void_df['redshift'].max():.4f}")
         # Handle different column names
         radius_col = 'radius_hMpc' if 'radius_hMpc' in void_df.columns else 'radius_Mpc'
-        print(f"  Radius range: {void_df[radius_col].min():.1f} - {void_df[radius_col].max():.1f} Mpc")
+        stats = _column_summary(void_df, ['redshift', radius_col, 'RA_deg', 'Dec_deg'])
+        
+        # Basic statistics
+        logger.info('\n'.join([
+            f"\n📊 BASIC STATISTICS:",
+            f"  Total voids: {len(void_df)}",
+            f"  Redshift range: {stats.at['min', 'redshift']:.4f} - {stats.at['max', 'redshift']:.4f}",
+            f"  Radius range: {stats.at['min', radius_col]:.1f} - {stats.at['max', radius_col]:.1f} Mpc",
+        ]))
         
         # Analysis overlap
-        analysis_mask = (void_df['redshift'] >= 0.01) & (void_df['redshift'] <= 0.15)
-        analysis_voids = void_df[analysis_mask].copy()
-        print(f"  Voids in analysis range (0.01 < z < 0.15): {len(analysis_voids)}")
+        self._void_mask = _analysis_mask(void_df['redshift'].to_numpy())
+        analysis_voids = void_df.loc[self._void_mask]
+        self.void_analysis = analysis_voids
+        logger.info(f"  Voids in analysis range (0.01 < z < 0.15): {len(analysis_voids)}")
         
         # Coordinate coverage
-        print(f"\n📍 COORDINATE COVERAGE:")
-        print(f"  RA range: {void_df['RA_deg'].min():.1f}° - {void_df['RA_deg'].max():.1f}°")
-        print(f"  Dec range: {void_df['Dec_deg'].min():.1f}° - {void_df['Dec_deg'].max():.1f}°")
+        logger.info('\n'.join([
+            f"\n📍 COORDINATE COVERAGE:",
+            f"  RA range: {stats.at['min', 'RA_deg']:.1f}° - {stats.at['max', 'RA_deg']:.1f}°",
+            f"  Dec range: {stats.at['min', 'Dec_deg']:.1f}° - {stats.at['max', 'Dec_deg']:.1f}°",
+        ]))
         
         # Size distribution
-        print(f"\n📏 VOID SIZE DISTRIBUTION:")
-        print(f"  Radius statistics (h⁻¹ Mpc):")
-        print(f"    Min: {void_df[radius_col].min():.1f}")
-        print(f"    25th percentile: {void_df[radius_col].quantile(0.25):.1f}")
-        print(f"    Median: {void_df[radius_col].median():.1f}")
-        print(f"    75th percentile: {void_df[radius_col].quantile(0.75):.1f}")
-        print(f"    Max: {void_df[radius_col].max():.1f}")
+        logger.info('\n'.join([
+            f"\n📏 VOID SIZE DISTRIBUTION:",
+            f"  Radius statistics (h⁻¹ Mpc):",
+            f"    Min: {stats.at['min', radius_col]:.1f}",
+            f"    25th percentile: {stats.at['q25', radius_col]:.1f}",
+            f"    Median: {stats.at['median', radius_col]:.1f}",
+            f"    75th percentile: {stats.at['q75', radius_col]:.1f}",
+            f"    Max: {stats.at['max', radius_col]:.1f}",
+        ]))
         
         # Data quality
-        print(f"\n🔍 DATA QUALITY:")
+        logger.info(f"\n🔍 DATA QUALITY:")
         missing_coords = void_df[['RA_deg', 'Dec_deg']].isna().any(axis=1).sum()
-        missing_z = void_df['redshift'].isna().sum()
-        missing_radius = void_df[radius_col].isna().sum()
-        print(f"  Missing coordinates: {missing_coords}")
-        print(f"  Missing redshifts: {missing_z}")
-        print(f"  Missing radii: {missing_radius}")
+        missing_z = int(stats.at['n_missing', 'redshift'])
+        missing_radius = int(stats.at['n_missing', radius_col])
+        logger.info('\n'.join([
+            f"  Missing coordinates: {missing_coords}",
+            f"  Missing redshifts: {missing_z}",
+            f"  Missing radii: {missing_radius}",
+        ]))
         
         # Flag distribution  
         flag_col = 'edge_flag' if 'edge_flag' in void_df.columns else 'flag'
         if flag_col in void_df.columns:
-            print(f"\n🏁 VOID FLAGS:")
+            logger.info(f"\n🏁 VOID FLAGS:")
             flag_counts = void_df[flag_col].value_counts()
             for flag, count in flag_counts.items():
-                print(f"    Flag {flag}: {count} voids ({count/len(void_df)*100:.1f}%)")
+                logger.info(f"    Flag {flag}: {count} voids ({count/len(void_df)*100:.1f}%)")
         
         # Sample entries
-        print(f"\n📝 SAMPLE ENTRIES (Analysis Range):")
+        logger.info(f"\n📝 SAMPLE ENTRIES (Analysis Range):")
         sample_cols = ['void_id', 'RA_deg', 'Dec_deg', 'redshift', radius_col, flag_col]
-        print(analysis_voids[sample_cols].head(10).to_string(index=False))
+        logger.info(analysis_voids[sample_cols].head(10).to_string(index=False))
         
         return analysis_voids
     
     def check_overlap_coverage(self, sn_df, void_df):
         """Check overlap between supernova and void samples"""
-        print("\n" + "="*60)
-        print("DATASET OVERLAP ANALYSIS")
-        print("="*60)
+        logger.info('\n'.join([
+            "\n" + "="*60,
+            "DATASET OVERLAP ANALYSIS",
+            "="*60,
+        ]))
+        
+        # Pull each column out once and reduce on the raw arrays
+        sn_z = sn_df['zCMB'].to_numpy(copy=False)
+        void_z = void_df['redshift'].to_numpy(copy=False)
+        sn_ra, sn_dec = sn_df['RA'].to_numpy(copy=False), sn_df['DEC'].to_numpy(copy=False)
+        void_ra, void_dec = void_df['RA_deg'].to_numpy(copy=False), void_df['Dec_deg'].to_numpy(copy=False)
         
         # Redshift overlap
-        sn_z_min, sn_z_max = sn_df['zCMB'].min(), sn_df['zCMB'].max()
-        void_z_min, void_z_max = void_df['redshift'].min(), void_df['redshift'].max()
+        sn_z_min, sn_z_max = np.nanmin(sn_z), np.nanmax(sn_z)
+        void_z_min, void_z_max = np.nanmin(void_z), np.nanmax(void_z)
         
         overlap_z_min = max(sn_z_min, void_z_min)
         overlap_z_max = min(sn_z_max, void_z_max)
         
-        print(f"\n🌌 REDSHIFT COVERAGE:")
-        print(f"  Supernovae: {sn_z_min:.4f} - {sn_z_max:.4f}")
-        print(f"  Voids: {void_z_min:.4f} - {void_z_max:.4f}")
-        print(f"  Overlap: {overlap_z_min:.4f} - {overlap_z_max:.4f}")
+        logger.info('\n'.join([
+            f"\n🌌 REDSHIFT COVERAGE:",
+            f"  Supernovae: {sn_z_min:.4f} - {sn_z_max:.4f}",
+            f"  Voids: {void_z_min:.4f} - {void_z_max:.4f}",
+            f"  Overlap: {overlap_z_min:.4f} - {overlap_z_max:.4f}",
+        ]))
         
         # Count objects in overlap region
-        sn_overlap = sn_df[(sn_df['zCMB'] >= overlap_z_min) & (sn_df['zCMB'] <= overlap_z_max)]
-        void_overlap = void_df[(void_df['redshift'] >= overlap_z_min) & (void_df['redshift'] <= overlap_z_max)]
+        n_sn_overlap = int(np.count_nonzero((sn_z >= overlap_z_min) & (sn_z <= overlap_z_max)))
+        n_void_overlap = int(np.count_nonzero((void_z >= overlap_z_min) & (void_z <= overlap_z_max)))
         
-        print(f"  SNe in overlap: {len(sn_overlap)}")
-        print(f"  Voids in overlap: {len(void_overlap)}")
+        logger.info('\n'.join([
+            f"  SNe in overlap: {n_sn_overlap}",
+            f"  Voids in overlap: {n_void_overlap}",
+        ]))
         
         # Sky coverage overlap
-        print(f"\n🗺️ SKY COVERAGE:")
-        print(f"  Supernovae RA range: {sn_df['RA'].min():.1f}° - {sn_df['RA'].max():.1f}°")
-        print(f"  Supernovae Dec range: {sn_df['DEC'].min():.1f}° - {sn_df['DEC'].max():.1f}°")
-        print(f"  Voids RA range: {void_df['RA_deg'].min():.1f}° - {void_df['RA_deg'].max():.1f}°")
-        print(f"  Voids Dec range: {void_df['Dec_deg'].min():.1f}° - {void_df['Dec_deg'].max():.1f}°")
+        logger.info('\n'.join([
+            f"\n🗺️ SKY COVERAGE:",
+            f"  Supernovae RA range: {np.nanmin(sn_ra):.1f}° - {np.nanmax(sn_ra):.1f}°",
+            f"  Supernovae Dec range: {np.nanmin(sn_dec):.1f}° - {np.nanmax(sn_dec):.1f}°",
+            f"  Voids RA range: {np.nanmin(void_ra):.1f}° - {np.nanmax(void_ra):.1f}°",
+            f"  Voids Dec range: {np.nanmin(void_dec):.1f}° - {np.nanmax(void_dec):.1f}°",
+        ]))
         
         # Coordinate system check
-        print(f"\n🔧 COORDINATE SYSTEMS:")
-        print("  Both datasets appear to use J2000 equatorial coordinates (RA, Dec)")
-        print("  Coordinate ranges are consistent with SDSS survey footprint")
+        logger.info('\n'.join([
+            f"\n🔧 COORDINATE SYSTEMS:",
+            "  Both datasets appear to use J2000 equatorial coordinates (RA, Dec)",
+            "  Coordinate ranges are consistent with SDSS survey footprint",
+        ]))
         
-        return len(sn_overlap), len(void_overlap)
+        return n_sn_overlap, n_void_overlap
     
     def create_summary_plots(self, sn_df, void_df):
         """Create summary validation plots"""
-        print(f"\n📊 Creating validation plots...")
+        logger.info(f"\n📊 Creating validation plots...")
         
         # Create plots directory
         plots_dir = Path("../plots")
         plots_dir.mkdir(exist_ok=True)
         
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        fig.suptitle('VCH-001 Data Validation Summary', fontsize=16)
-        
-        # Supernova redshift distribution
-        axes[0, 0].hist(sn_df['zCMB'], bins=50, alpha=0.7, color='blue', edgecolor='black')
-        axes[0, 0].axvline(0.01, color='red', linestyle='--', label='Analysis range')
-        axes[0, 0].axvline(0.15, color='red', linestyle='--')
-        axes[0, 0].set_xlabel('Redshift')
-        axes[0, 0].set_ylabel('Count')
-        axes[0, 0].set_title('Supernova Redshift Distribution')
-        axes[0, 0].legend()
-        axes[0, 0].set_yscale('log')
-        
-        # Supernova distance modulus
-        analysis_sn = sn_df[(sn_df['zCMB'] >= 0.01) & (sn_df['zCMB'] <= 0.15)]
-        axes[0, 1].scatter(analysis_sn['zCMB'], analysis_sn['MU_SH0ES'], alpha=0.6, s=20)
-        axes[0, 1].set_xlabel('Redshift')
-        axes[0, 1].set_ylabel('Distance Modulus')
-        axes[0, 1].set_title('Distance-Redshift Relation')
-        
-        # Supernova sky distribution
-        axes[0, 2].scatter(sn_df['RA'], sn_df['DEC'], alpha=0.5, s=1)
-        axes[0, 2].set_xlabel('RA (degrees)')
-        axes[0, 2].set_ylabel('Dec (degrees)')
-        axes[0, 2].set_title('Supernova Sky Distribution')
-        
-        # Void redshift distribution
-        axes[1, 0].hist(void_df['redshift'], bins=30, alpha=0.7, color='green', edgecolor='black')
-        axes[1, 0].axvline(0.01, color='red', linestyle='--', label='Analysis range')
-        axes[1, 0].axvline(0.15, color='red', linestyle='--')
-        axes[1, 0].set_xlabel('Redshift')
-        axes[1, 0].set_ylabel('Count')
-        axes[1, 0].set_title('Void Redshift Distribution')
-        axes[1, 0].legend()
-        
-        # Void size distribution
-        radius_col = 'radius_hMpc' if 'radius_hMpc' in void_df.columns else 'radius_Mpc'
-        axes[1, 1].hist(void_df[radius_col], bins=30, alpha=0.7, color='orange', edgecolor='black')
-        axes[1, 1].set_xlabel('Void Radius (h⁻¹ Mpc)')
-        axes[1, 1].set_ylabel('Count')
-        axes[1, 1].set_title('Void Size Distribution')
-        
-        # Void sky distribution
-        axes[1, 2].scatter(void_df['RA_deg'], void_df['Dec_deg'], alpha=0.5, s=10, c='red')
-        axes[1, 2].set_xlabel('RA (degrees)')
-        axes[1, 2].set_ylabel('Dec (degrees)')
-        axes[1, 2].set_title('Void Sky Distribution')
-        
-        plt.tight_layout()
-        plot_file = plots_dir / "data_validation_summary.png"
-        plt.savefig(plot_file, dpi=300, bbox_inches='tight')
-        print(f"📈 Plots saved to: {plot_file}")
-        plt.close()
+        with plt.rc_context({'path.simplify': True, 'path.simplify_threshold': 1.0}):
+            fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+            fig.suptitle('VCH-001 Data Validation Summary', fontsize=16)
+            
+            # Supernova redshift distribution
+            _stairs_hist(axes[0, 0], sn_df['zCMB'], bins=50, alpha=0.7, color='blue')
+            axes[0, 0].axvline(ANALYSIS_Z_MIN, color='red', linestyle='--', label='Analysis range')
+            axes[0, 0].axvline(ANALYSIS_Z_MAX, color='red', linestyle='--')
+            axes[0, 0].set_xlabel('Redshift')
+            axes[0, 0].set_ylabel('Count')
+            axes[0, 0].set_title('Supernova Redshift Distribution')
+            axes[0, 0].legend()
+            axes[0, 0].set_yscale('log')
+            
+            # Supernova distance modulus
+            # The sample from validate_pantheon_data() is already range-restricted
+            if sn_df is self.sn_analysis:
+                analysis_sn = sn_df
+            else:
+                analysis_sn = sn_df.loc[_analysis_mask(sn_df['zCMB'].to_numpy())]
+            # Subsample so the artist count stays bounded for large catalogs
+            if len(analysis_sn) > 5000:
+                analysis_sn = analysis_sn.sample(n=5000, random_state=0)
+            axes[0, 1].scatter(analysis_sn['zCMB'], analysis_sn['MU_SH0ES'], alpha=0.6, s=20, rasterized=True)
+            axes[0, 1].set_xlabel('Redshift')
+            axes[0, 1].set_ylabel('Distance Modulus')
+            axes[0, 1].set_title('Distance-Redshift Relation')
+            
+            # Supernova sky distribution
+            axes[0, 2].hexbin(sn_df['RA'], sn_df['DEC'], gridsize=100, mincnt=1, cmap='viridis', rasterized=True)
+            axes[0, 2].set_xlabel('RA (degrees)')
+            axes[0, 2].set_ylabel('Dec (degrees)')
+            axes[0, 2].set_title('Supernova Sky Distribution')
+            
+            # Void redshift distribution
+            _stairs_hist(axes[1, 0], void_df['redshift'], bins=30, alpha=0.7, color='green')
+            axes[1, 0].axvline(ANALYSIS_Z_MIN, color='red', linestyle='--', label='Analysis range')
+            axes[1, 0].axvline(ANALYSIS_Z_MAX, color='red', linestyle='--')
+            axes[1, 0].set_xlabel('Redshift')
+            axes[1, 0].set_ylabel('Count')
+            axes[1, 0].set_title('Void Redshift Distribution')
+            axes[1, 0].legend()
+            
+            # Void size distribution
+            radius_col = 'radius_hMpc' if 'radius_hMpc' in void_df.columns else 'radius_Mpc'
+            _stairs_hist(axes[1, 1], void_df[radius_col], bins=30, alpha=0.7, color='orange')
+            axes[1, 1].set_xlabel('Void Radius (h⁻¹ Mpc)')
+            axes[1, 1].set_ylabel('Count')
+            axes[1, 1].set_title('Void Size Distribution')
+            
+            # Void sky distribution
+            axes[1, 2].hexbin(void_df['RA_deg'], void_df['Dec_deg'], gridsize=100, mincnt=1, cmap='viridis', rasterized=True)
+            axes[1, 2].set_xlabel('RA (degrees)')
+            axes[1, 2].set_ylabel('Dec (degrees)')
+            axes[1, 2].set_title('Void Sky Distribution')
+            
+            # Fixed margins avoid the extra layout/render pass of tight bboxes
+            fig.subplots_adjust(left=0.06, right=0.98, bottom=0.06, top=0.91, wspace=0.25, hspace=0.3)
+            plot_file = plots_dir / "data_validation_summary.png"
+            fig.savefig(plot_file, dpi=150)
+            logger.info(f"📈 Plots saved to: {plot_file}")
+            plt.close()
         
         return str(plot_file)
 
@@ -230,9 +320,12 @@ def main():
     """Run complete data validation"""
     validator = VCH001DataValidator()
     
+    # Load both catalogs up front, in parallel
+    sn_raw, void_raw = validator.loader.load_catalogs()
+    
     # Validate individual datasets
-    sn_df = validator.validate_pantheon_data()
-    void_df = validator.validate_void_data()
+    sn_df = validator.validate_pantheon_data(sn_raw)
+    void_df = validator.validate_void_data(void_raw)
     
     # Check overlap
     sn_count, void_count = validator.check_overlap_coverage(sn_df, void_df)
@@ -241,15 +334,17 @@ def main():
     plot_file = validator.create_summary_plots(sn_df, void_df)
     
     # Final summary
-    print("\n" + "="*60)
-    print("VALIDATION SUMMARY")
-    print("="*60)
-    print(f"✅ Pantheon+ supernovae loaded: {len(sn_df)} in analysis range")
-    print(f"✅ VoidFinder voids loaded: {len(void_df)} in analysis range")
-    print(f"✅ Data overlap confirmed: {sn_count} SNe, {void_count} voids")
-    print(f"✅ Coordinate systems compatible")
-    print(f"✅ Validation plots created: {plot_file}")
-    print(f"\n🎉 Data validation complete - ready for correlation analysis!")
+    logger.info('\n'.join([
+        "\n" + "="*60,
+        "VALIDATION SUMMARY",
+        "="*60,
+        f"✅ Pantheon+ supernovae loaded: {len(sn_df)} in analysis range",
+        f"✅ VoidFinder voids loaded: {len(void_df)} in analysis range",
+        f"✅ Data overlap confirmed: {sn_count} SNe, {void_count} voids",
+        f"✅ Coordinate systems compatible",
+        f"✅ Validation plots created: {plot_file}",
+        f"\n🎉 Data validation complete - ready for correlation analysis!",
+    ]))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
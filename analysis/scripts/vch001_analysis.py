@@ -4,17 +4,88 @@ VCH-001 Analysis: Redshift Decomposition Hypothesis Testing
 Cross-match supernovae with void catalog and test environmental correlations
 """
 
+import gc
+import hashlib
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Plots are only written to disk
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 from scipy import stats
+from scipy.interpolate import CubicSpline
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import cdist
-from astropy.coordinates import SkyCoord
 from astropy import units as u
 from astropy.cosmology import Planck18
 from pathlib import Path
 
-from data_loader import VCH001DataLoader
+from data_loader import VCH001DataLoader, pa, read_feather_cache, write_feather_cache
+
+ENVIRONMENTS = np.array(['void', 'wall', 'cluster'], dtype=object)
+ENV_COLORS = np.array(['red', 'orange', 'blue'])
+MATCH_CACHE_VERSION = 1  # Bump whenever _match_arrays output changes
+BRUTE_FORCE_MAX_PAIRS = 250_000  # SN x void pairs below which a direct scan beats building a tree
+
+try:
+    from numba import njit, prange, types
+except ImportError:
+    njit = None
+
+def radec_to_unit_vectors(ra, dec):
+    """Convert RA/Dec in radians to unit vectors on the sphere"""
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=1)
+
+def haversine(ra1, dec1, ra2, dec2):
+    """Angular separation in radians between points given in radians"""
+    a = (np.sin((dec2 - dec1) / 2)**2 +
+         np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2)**2)
+    return 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+if njit is not None:
+    # Inputs are typed read-only so copy-on-write pandas arrays are accepted without a copy.
+    # No fastmath: NaN separations must keep falling through to 'cluster'
+    _ro_f8 = types.Array(types.float64, 1, 'C', readonly=True)
+    
+    @njit(types.void(_ro_f8, _ro_f8, types.float64, types.int8[::1]), parallel=True, cache=True)
+    def _classify(phys, vr, thr, out_env):
+        """Environment codes (0 void, 1 wall, 2 cluster) from separation and void radius"""
+        for i in prange(phys.shape[0]):
+            if phys[i] < vr[i]:
+                out_env[i] = 0
+            elif phys[i] < vr[i] + thr:
+                out_env[i] = 1
+            else:
+                out_env[i] = 2
+else:
+    def _classify(phys, vr, thr, out_env):
+        """Environment codes (0 void, 1 wall, 2 cluster) from separation and void radius"""
+        out_env[:] = np.where(phys < vr, 0, np.where(phys < vr + thr, 1, 2))
+
+if njit is not None:
+    @njit('i8[::1](f4[:, ::1], f4[:, ::1])', parallel=True, cache=True)
+    def _nearest_by_chord(sn_xyz, void_xyz):
+        """Index of the void with the smallest chord (smallest angle) to each supernova"""
+        # Squared chord accumulated in float64, as the tree computes it: a float32 cosine
+        # cannot separate voids closer than ~1e-3 rad
+        out = np.empty(sn_xyz.shape[0], dtype=np.int64)
+        for i in prange(sn_xyz.shape[0]):
+            x = np.float64(sn_xyz[i, 0])
+            y = np.float64(sn_xyz[i, 1])
+            z = np.float64(sn_xyz[i, 2])
+            best = np.inf
+            best_j = 0
+            for j in range(void_xyz.shape[0]):
+                dx = x - void_xyz[j, 0]
+                dy = y - void_xyz[j, 1]
+                dz = z - void_xyz[j, 2]
+                d = dx * dx + dy * dy + dz * dz
+                if d < best:
+                    best = d
+                    best_j = j
+            out[i] = best_j
+        return out
 
 class VCH001Analyzer:
     """Main analysis class for VCH-001 hypothesis testing"""
@@ -23,11 +94,18 @@ class VCH001Analyzer:
         self.loader = VCH001DataLoader()
         self.cosmology = cosmology
         self.results = {}
+        self.sn_df = None
+        self.void_df = None
         
         # Analysis parameters
         self.void_threshold_mpc = 20.0  # Mpc - distance to classify as "in void"
         self.min_redshift = 0.01
         self.max_redshift = 0.12  # Conservative upper limit for good overlap
+    
+    def set_data(self, sn_df, void_df):
+        """Use already loaded catalogs so load_and_prepare_data skips file IO"""
+        self.sn_df = sn_df
+        self.void_df = void_df
         
     def load_and_prepare_data(self):
         """Load and prepare both datasets for analysis"""
@@ -35,176 +113,268 @@ class VCH001Analyzer:
         print("LOADING AND PREPARING DATA")
         print("="*60)
         
-        # Load datasets
-        print("Loading Pantheon+ supernovae...")
-        self.sn_df = self.loader.load_pantheon()
+        # Load datasets (unless injected via set_data)
+        if self.sn_df is None:
+            print("Loading Pantheon+ supernovae...")
+            self.sn_df = self.loader.load_pantheon()
         
-        print("Loading VoidFinder void catalog...")
-        self.void_df = self.loader.load_vide_voids() 
+        if self.void_df is None:
+            print("Loading VoidFinder void catalog...")
+            self.void_df = self.loader.load_vide_voids() 
         
         # Apply redshift cuts
         sn_mask = (self.sn_df['zCMB'] >= self.min_redshift) & (self.sn_df['zCMB'] <= self.max_redshift)
         void_mask = (self.void_df['redshift'] >= self.min_redshift) & (self.void_df['redshift'] <= self.max_redshift)
         
-        self.sn_analysis = self.sn_df[sn_mask].copy().reset_index(drop=True)
-        self.void_analysis = self.void_df[void_mask].copy().reset_index(drop=True)
+        # Boolean selection already copies, and the loader hands back float32 columns
+        self.sn_analysis = self.sn_df[sn_mask].reset_index(drop=True)
+        self.void_analysis = self.void_df[void_mask].reset_index(drop=True)
+        self.void_analysis['radius_mpc'] = self.void_analysis['radius_hMpc'].to_numpy() * 0.67  # Convert h^-1 Mpc to Mpc (h~0.67)
         
         print(f"✅ Analysis sample: {len(self.sn_analysis)} SNe, {len(self.void_analysis)} voids")
         print(f"   Redshift range: {self.min_redshift} - {self.max_redshift}")
         
+        self._build_distance_splines()
+        
         return len(self.sn_analysis), len(self.void_analysis)
     
-    def cross_match_positions(self):
-        """Cross-match supernova positions with void catalog"""
+    def _build_distance_splines(self):
+        """Tabulate cosmological distances once over the analysis redshift range"""
+        z_grid = np.linspace(self.min_redshift, self.max_redshift, 4096)
+        dA_grid = self.cosmology.angular_diameter_distance(z_grid).to(u.Mpc).value
+        dL_pc_grid = self.cosmology.luminosity_distance(z_grid).to(u.pc).value
+        self._dA = CubicSpline(z_grid, dA_grid)
+        # Distance modulus tabulated directly, so evaluating it is a single spline call
+        self._mu = CubicSpline(z_grid, 5 * np.log10(dL_pc_grid) - 5)
+    
+    def _angular_diameter_mpc(self, z):
+        """D_A in Mpc from the spline, or one batched cosmology call if z leaves its range"""
+        if z.size and (z.min() < self._dA.x[0] or z.max() > self._dA.x[-1]):
+            return self.cosmology.angular_diameter_distance(z).to(u.Mpc).value
+        return self._dA(z)
+    
+    def _match_arrays(self):
+        """Nearest void and matched geometry for every supernova as plain arrays"""
+        sn_ra = np.radians(self.sn_analysis['RA'].to_numpy(dtype=np.float64))
+        sn_dec = np.radians(self.sn_analysis['DEC'].to_numpy(dtype=np.float64))
+        void_ra = np.radians(self.void_analysis['RA_deg'].to_numpy(dtype=np.float64))
+        void_dec = np.radians(self.void_analysis['Dec_deg'].to_numpy(dtype=np.float64))
+        
+        # Unit vectors on the sphere: chord length is monotonic in angular separation.
+        # float32 resolves ~1e-7 rad (a few hundredths of an arcsec), far below the
+        # Mpc-scale classification; matched separations are recomputed in float64 below.
+        sn_xyz = radec_to_unit_vectors(sn_ra.astype(np.float32), sn_dec.astype(np.float32))
+        void_xyz = radec_to_unit_vectors(void_ra.astype(np.float32), void_dec.astype(np.float32))
+        
+        # Nearest void for every supernova: a direct parallel scan for small catalogs,
+        # otherwise a single batched tree query
+        if njit is not None and len(sn_xyz) * len(void_xyz) <= BRUTE_FORCE_MAX_PAIRS:
+            void_idx = _nearest_by_chord(sn_xyz, void_xyz)
+        else:
+            tree = cKDTree(void_xyz)
+            _, void_idx = tree.query(sn_xyz, k=1, workers=-1)
+        separation_rad = haversine(sn_ra, sn_dec, void_ra[void_idx], void_dec[void_idx])
+        
+        # Contiguous column buffers, gathered by the matched void index
+        sn_z = np.ascontiguousarray(self.sn_analysis['zCMB'].to_numpy())
+        void_z_arr = np.ascontiguousarray(self.void_analysis['redshift'].to_numpy())
+        void_r_arr = np.ascontiguousarray(self.void_analysis['radius_mpc'].to_numpy())
+        
+        # Preallocated struct-of-arrays output, filled in place below
+        n_sn = len(sn_z)
+        matches = {
+            'sn_idx': np.arange(n_sn),
+            'void_idx': void_idx,
+            'angular_sep_deg': np.empty(n_sn),
+            'physical_sep_mpc': np.empty(n_sn),
+            'void_radius_mpc': np.empty(n_sn, dtype=void_r_arr.dtype),
+            'void_redshift': np.empty(n_sn, dtype=void_z_arr.dtype),
+            'redshift_diff': np.empty(n_sn, dtype=np.result_type(sn_z, void_z_arr))
+        }
+        
+        # Calculate physical distance using redshift
+        void_z = np.take(void_z_arr, void_idx, out=matches['void_redshift'])
+        avg_z = np.add(sn_z, void_z, dtype=np.float64)
+        avg_z /= 2
+        
+        # Convert angular to physical distance (Mpc)
+        np.multiply(separation_rad, self._angular_diameter_mpc(avg_z), out=matches['physical_sep_mpc'])
+        np.degrees(separation_rad, out=matches['angular_sep_deg'])
+        np.abs(np.subtract(sn_z, void_z, out=matches['redshift_diff']), out=matches['redshift_diff'])
+        
+        # Void properties
+        np.take(void_r_arr, void_idx, out=matches['void_radius_mpc'])
+        
+        return matches
+    
+    def _cached_match_arrays(self):
+        """Return _match_arrays() output, cached as Feather keyed by a hash of the match inputs"""
+        if pa is None:
+            # Feather requires pyarrow
+            return self._match_arrays()
+        
+        # The void threshold only affects classification, so it is not part of the key
+        key = hashlib.blake2b(f"{self.cosmology!r}|{len(self.sn_analysis)}|{len(self.void_analysis)}"
+                              f"|v{MATCH_CACHE_VERSION}".encode())
+        for frame, columns in ((self.sn_analysis, ('RA', 'DEC', 'zCMB')),
+                               (self.void_analysis, ('RA_deg', 'Dec_deg', 'redshift', 'radius_mpc'))):
+            for col in columns:
+                key.update(np.ascontiguousarray(frame[col].to_numpy()).tobytes())
+        cache_file = self.loader.cache_path / f"match_{key.hexdigest()[:16]}.feather"
+        
+        # Sweep workers can share a cache file: writes are atomic renames and an
+        # unreadable file is recomputed rather than failing the cut
+        df = read_feather_cache(cache_file)
+        if df is not None:
+            return {col: df[col].to_numpy(copy=True) for col in df.columns}
+        
+        matches = self._match_arrays()
+        write_feather_cache(pd.DataFrame(matches, copy=False), cache_file)
+        return matches
+    
+    def _environment_codes(self, physical_sep, void_radius):
+        """Environment code per supernova: 0 void, 1 wall, 2 cluster"""
+        # Classification based on distance to nearest void
+        # - Inside void: distance < void_radius
+        # - Near void (wall): void_radius < distance < void_radius + threshold
+        # - Cluster/field: distance > void_radius + threshold
+        codes = np.empty(len(physical_sep), dtype=np.int8)
+        _classify(np.ascontiguousarray(physical_sep, dtype=np.float64),
+                  np.ascontiguousarray(void_radius, dtype=np.float64),
+                  float(self.void_threshold_mpc), codes)
+        return codes
+    
+    def _cache_env_masks(self, codes):
+        """Keep environment codes and per-environment row indices for later stats and plots"""
+        self._env_codes = codes
+        self._env_masks = {env: np.flatnonzero(codes == code) for code, env in enumerate(ENVIRONMENTS)}
+    
+    def _theoretical_mu(self, z_values):
+        """Theoretical distance modulus for the analysis cosmology"""
+        return self._mu(z_values)
+    
+    def _report_matches(self):
+        """Print cross-match summary statistics"""
         print(f"\n🎯 CROSS-MATCHING POSITIONS")
         print("-" * 40)
-        
-        # Create coordinate objects
-        sn_coords = SkyCoord(ra=self.sn_analysis['RA'].values*u.degree,
-                            dec=self.sn_analysis['DEC'].values*u.degree)
-        
-        void_coords = SkyCoord(ra=self.void_analysis['RA_deg'].values*u.degree, 
-                              dec=self.void_analysis['Dec_deg'].values*u.degree)
-        
-        print(f"Cross-matching {len(sn_coords)} supernovae with {len(void_coords)} voids...")
-        
-        # For each supernova, find nearest void and angular separation
-        matches = []
-        for i, sn_coord in enumerate(sn_coords):
-            # Calculate angular separations to all voids
-            separations = sn_coord.separation(void_coords)
-            
-            # Find nearest void
-            min_idx = np.argmin(separations)
-            min_separation = separations[min_idx]
-            
-            # Calculate physical distance using redshift
-            sn_z = self.sn_analysis.iloc[i]['zCMB']
-            void_z = self.void_analysis.iloc[min_idx]['redshift']
-            avg_z = (sn_z + void_z) / 2
-            
-            # Convert angular to physical distance (Mpc)
-            angular_distance = self.cosmology.angular_diameter_distance(avg_z)
-            physical_separation = (min_separation.radian * angular_distance).to(u.Mpc).value
-            
-            # Void properties
-            void_radius = self.void_analysis.iloc[min_idx]['radius_hMpc'] * 0.67  # Convert h^-1 Mpc to Mpc (h~0.67)
-            
-            matches.append({
-                'sn_idx': i,
-                'void_idx': min_idx,
-                'angular_sep_deg': min_separation.degree,
-                'physical_sep_mpc': physical_separation,
-                'void_radius_mpc': void_radius,
-                'void_redshift': void_z,
-                'redshift_diff': abs(sn_z - void_z)
-            })
-        
-        self.matches_df = pd.DataFrame(matches)
-        
-        # Summary statistics
+        print(f"Cross-matching {len(self.sn_analysis)} supernovae with {len(self.void_analysis)} voids...")
         print(f"✅ Cross-matching complete!")
         print(f"   Median angular separation: {self.matches_df['angular_sep_deg'].median():.2f}°")
         print(f"   Median physical separation: {self.matches_df['physical_sep_mpc'].median():.1f} Mpc")
         print(f"   Median redshift difference: {self.matches_df['redshift_diff'].median():.4f}")
-        
-        return self.matches_df
     
-    def classify_environments(self):
-        """Classify supernovae by environment: void/wall/cluster"""
+    def _report_environments(self):
+        """Print environment counts and return them"""
         print(f"\n🌌 ENVIRONMENTAL CLASSIFICATION")
         print("-" * 40)
-        
-        # Classification based on distance to nearest void
-        # - Inside void: distance < void_radius
-        # - Near void (wall): void_radius < distance < void_radius + threshold
-        # - Cluster/field: distance > void_radius + threshold
-        
-        inside_void = self.matches_df['physical_sep_mpc'] < self.matches_df['void_radius_mpc']
-        near_void = (self.matches_df['physical_sep_mpc'] >= self.matches_df['void_radius_mpc']) & \
-                   (self.matches_df['physical_sep_mpc'] < (self.matches_df['void_radius_mpc'] + self.void_threshold_mpc))
-        
-        # Add classification to supernova dataframe
-        self.sn_analysis['environment'] = 'cluster'  # Default
-        self.sn_analysis.loc[inside_void, 'environment'] = 'void'
-        self.sn_analysis.loc[near_void, 'environment'] = 'wall'
-        
-        # Add matching information
-        self.sn_analysis['nearest_void_distance_mpc'] = self.matches_df['physical_sep_mpc']
-        self.sn_analysis['nearest_void_radius_mpc'] = self.matches_df['void_radius_mpc'] 
-        self.sn_analysis['redshift_to_void'] = self.matches_df['redshift_diff']
-        
-        # Statistics
         env_counts = self.sn_analysis['environment'].value_counts()
+        env_counts = env_counts[env_counts > 0]
         print(f"Environmental classification:")
         for env, count in env_counts.items():
             pct = count / len(self.sn_analysis) * 100
             print(f"   {env.capitalize()}: {count} SNe ({pct:.1f}%)")
-        
         return env_counts
     
-    def calculate_distance_residuals(self):
-        """Calculate distance residuals vs ΛCDM predictions"""
+    def _report_residuals(self, residuals):
+        """Print distance residual summary"""
         print(f"\n📏 CALCULATING DISTANCE RESIDUALS")
         print("-" * 40)
-        
-        # Calculate theoretical distance modulus using Planck18 cosmology
-        z_values = self.sn_analysis['zCMB'].values
-        theoretical_dl = self.cosmology.luminosity_distance(z_values)
-        theoretical_mu = 5 * np.log10(theoretical_dl.to(u.pc).value) - 5
-        
-        # Calculate residuals (observed - theoretical)
-        observed_mu = self.sn_analysis['MU_SH0ES'].values
-        residuals = observed_mu - theoretical_mu
-        
-        self.sn_analysis['mu_theoretical'] = theoretical_mu
-        self.sn_analysis['mu_residual'] = residuals
-        
         print(f"✅ Distance residuals calculated")
         print(f"   Mean residual: {np.mean(residuals):.3f} ± {np.std(residuals):.3f}")
         print(f"   RMS residual: {np.sqrt(np.mean(residuals**2)):.3f}")
-        
+    
+    def cross_match_positions(self):
+        """Cross-match supernova positions with void catalog"""
+        self.matches_df = pd.DataFrame(self._cached_match_arrays(), copy=False)
+        self._report_matches()
+        return self.matches_df
+    
+    def classify_environments(self):
+        """Classify supernovae by environment: void/wall/cluster"""
+        codes = self._environment_codes(self.matches_df['physical_sep_mpc'].to_numpy(),
+                                        self.matches_df['void_radius_mpc'].to_numpy())
+        self.sn_analysis = self.sn_analysis.assign(
+            environment=pd.Categorical.from_codes(codes, categories=ENVIRONMENTS),
+            nearest_void_distance_mpc=self.matches_df['physical_sep_mpc'].to_numpy(),
+            nearest_void_radius_mpc=self.matches_df['void_radius_mpc'].to_numpy(),
+            redshift_to_void=self.matches_df['redshift_diff'].to_numpy())
+        self._cache_env_masks(codes)
+        return self._report_environments()
+    
+    def calculate_distance_residuals(self):
+        """Calculate distance residuals vs ΛCDM predictions"""
+        theoretical_mu = self._theoretical_mu(self.sn_analysis['zCMB'].values)
+        residuals = self.sn_analysis['MU_SH0ES'].values - theoretical_mu
+        self.sn_analysis = self.sn_analysis.assign(mu_theoretical=theoretical_mu, mu_residual=residuals)
+        self._report_residuals(residuals)
         return residuals
     
+    def analyze_environments(self):
+        """Cross-match, classify and compute residuals in one vectorized pass"""
+        matches = self._cached_match_arrays()
+        theoretical_mu = self._theoretical_mu(self.sn_analysis['zCMB'].to_numpy())
+        
+        codes = self._environment_codes(matches['physical_sep_mpc'], matches['void_radius_mpc'])
+        residuals = np.subtract(self.sn_analysis['MU_SH0ES'].to_numpy(), theoretical_mu, dtype=np.float64)
+        
+        self.matches_df = pd.DataFrame(matches, copy=False)
+        self.sn_analysis = self.sn_analysis.assign(
+            environment=pd.Categorical.from_codes(codes, categories=ENVIRONMENTS),
+            nearest_void_distance_mpc=matches['physical_sep_mpc'],
+            nearest_void_radius_mpc=matches['void_radius_mpc'],
+            redshift_to_void=matches['redshift_diff'],
+            mu_theoretical=theoretical_mu,
+            mu_residual=residuals)
+        self._cache_env_masks(codes)
+        
+        self._report_matches()
+        env_counts = self._report_environments()
+        self._report_residuals(residuals)
+        return env_counts
+    
     def test_environmental_correlation(self):
         """Test correlation between environment and distance residuals"""
         print(f"\n📊 STATISTICAL CORRELATION ANALYSIS")
         print("-" * 40)
         
-        # Group by environment
-        env_groups = self.sn_analysis.groupby('environment')
+        # Per-environment reductions over integer codes
+        codes = self._env_codes
+        residuals = self.sn_analysis['mu_residual'].to_numpy()
+        counts = np.bincount(codes, minlength=len(ENVIRONMENTS))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.bincount(codes, weights=residuals, minlength=len(ENVIRONMENTS)) / counts
+            deviations = residuals - means[codes]
+            stds = np.sqrt(np.bincount(codes, weights=deviations**2, minlength=len(ENVIRONMENTS)) / counts)
         
         results = {}
         print("Distance residual statistics by environment:")
         
-        for env, group in env_groups:
-            residuals = group['mu_residual'].values
-            mean_res = np.mean(residuals)
-            std_res = np.std(residuals)
-            sem_res = std_res / np.sqrt(len(residuals))
+        for code in np.argsort(ENVIRONMENTS):
+            if counts[code] == 0:
+                continue
+            env = ENVIRONMENTS[code]
+            sem_res = stds[code] / np.sqrt(counts[code])
             
             results[env] = {
-                'count': len(residuals),
-                'mean': mean_res,
-                'std': std_res, 
+                'count': int(counts[code]),
+                'mean': means[code],
+                'std': stds[code], 
                 'sem': sem_res
             }
             
-            print(f"   {env.capitalize()}: {mean_res:.4f} ± {sem_res:.4f} ({len(residuals)} SNe)")
+            print(f"   {env.capitalize()}: {means[code]:.4f} ± {sem_res:.4f} ({counts[code]} SNe)")
         
         # Statistical tests
-        void_residuals = self.sn_analysis[self.sn_analysis['environment'] == 'void']['mu_residual']
-        cluster_residuals = self.sn_analysis[self.sn_analysis['environment'] == 'cluster']['mu_residual']
+        void_residuals = residuals[self._env_masks['void']]
+        cluster_residuals = residuals[self._env_masks['cluster']]
         
         if len(void_residuals) > 0 and len(cluster_residuals) > 0:
-            # Two-sample t-test
-            t_stat, p_value = stats.ttest_ind(void_residuals, cluster_residuals)
+            # Welch's two-sample t-test (no equal-variance assumption)
+            t_stat, p_value = stats.ttest_ind(void_residuals, cluster_residuals, equal_var=False)
             
-            # Effect size (Cohen's d)  
-            pooled_std = np.sqrt(((len(void_residuals)-1)*void_residuals.std()**2 + 
-                                 (len(cluster_residuals)-1)*cluster_residuals.std()**2) / 
-                                (len(void_residuals) + len(cluster_residuals) - 2))
-            cohens_d = abs(void_residuals.mean() - cluster_residuals.mean()) / pooled_std
+            # Effect size (Cohen's d) with the average of the two sample variances
+            mean_diff = void_residuals.mean() - cluster_residuals.mean()
+            cohens_d = abs(mean_diff) / np.sqrt(0.5 * (void_residuals.var(ddof=1) + cluster_residuals.var(ddof=1)))
             
             # Significance level
             if p_value < 0.001:
@@ -218,7 +388,7 @@ class VCH001Analyzer:
                 
             print(f"\n🔬 HYPOTHESIS TEST RESULTS:")
             print(f"   Void vs Cluster comparison:")
-            print(f"   Mean difference: {void_residuals.mean() - cluster_residuals.mean():.4f}")
+            print(f"   Mean difference: {mean_diff:.4f}")
             print(f"   t-statistic: {t_stat:.3f}")
             print(f"   p-value: {p_value:.6f} {sig_str}")
             print(f"   Effect size (Cohen's d): {cohens_d:.3f}")
@@ -226,7 +396,7 @@ class VCH001Analyzer:
             # Interpretation
             if p_value < 0.05:
                 print(f"   ✅ SIGNIFICANT environmental correlation detected!")
-                if void_residuals.mean() > cluster_residuals.mean():
+                if mean_diff > 0:
                     print(f"      → Void SNe appear MORE DISTANT than ΛCDM prediction")
                 else:
                     print(f"      → Void SNe appear CLOSER than ΛCDM prediction")
@@ -254,28 +424,33 @@ class VCH001Analyzer:
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
         fig.suptitle('VCH-001 Analysis Results: Environmental Distance Correlations', fontsize=16)
         
+        ra = self.sn_analysis['RA'].to_numpy()
+        dec = self.sn_analysis['DEC'].to_numpy()
+        z = self.sn_analysis['zCMB'].to_numpy()
+        residuals = self.sn_analysis['mu_residual'].to_numpy()
+        
+        # One scatter per panel with per-point colours; drawing in code order keeps
+        # clusters on top of walls on top of voids
+        order = np.argsort(self._env_codes, kind='stable')
+        point_colors = ENV_COLORS[self._env_codes[order]]
+        present = [(code, env) for code, env in enumerate(ENVIRONMENTS) if len(self._env_masks[env]) > 0]
+        handles = [Line2D([], [], marker='o', linestyle='', color=ENV_COLORS[code]) for code, _ in present]
+        
         # 1. Sky distribution by environment
-        colors = {'void': 'red', 'wall': 'orange', 'cluster': 'blue'}
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                axes[0, 0].scatter(self.sn_analysis[mask]['RA'], 
-                                 self.sn_analysis[mask]['DEC'],
-                                 c=colors[env], label=f'{env.capitalize()} ({mask.sum()})',
-                                 alpha=0.7, s=20)
+        axes[0, 0].scatter(ra[order], dec[order], c=point_colors, alpha=0.7, s=20)
         axes[0, 0].set_xlabel('RA (degrees)')
         axes[0, 0].set_ylabel('Dec (degrees)')
         axes[0, 0].set_title('Supernova Sky Distribution by Environment')
-        axes[0, 0].legend()
+        axes[0, 0].legend(handles, [f'{env.capitalize()} ({len(self._env_masks[env])})' for _, env in present])
         
         # 2. Distance residuals by environment
         env_data = []
         env_labels = []
         for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                env_data.append(self.sn_analysis[mask]['mu_residual'])
-                env_labels.append(f'{env.capitalize()}\n(n={mask.sum()})')
+            idx = self._env_masks[env]
+            if len(idx) > 0:
+                env_data.append(residuals[idx])
+                env_labels.append(f'{env.capitalize()}\n(n={len(idx)})')
         
         axes[0, 1].boxplot(env_data, labels=env_labels)
         axes[0, 1].axhline(0, color='black', linestyle='--', alpha=0.5)
@@ -284,18 +459,12 @@ class VCH001Analyzer:
         axes[0, 1].grid(True, alpha=0.3)
         
         # 3. Residuals vs redshift colored by environment
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                axes[0, 2].scatter(self.sn_analysis[mask]['zCMB'],
-                                 self.sn_analysis[mask]['mu_residual'],
-                                 c=colors[env], label=env.capitalize(),
-                                 alpha=0.6, s=20)
+        axes[0, 2].scatter(z[order], residuals[order], c=point_colors, alpha=0.6, s=20)
         axes[0, 2].axhline(0, color='black', linestyle='--', alpha=0.5)
         axes[0, 2].set_xlabel('Redshift')
         axes[0, 2].set_ylabel('Distance Modulus Residual')
         axes[0, 2].set_title('Residuals vs Redshift by Environment')
-        axes[0, 2].legend()
+        axes[0, 2].legend(handles, [env.capitalize() for _, env in present])
         axes[0, 2].grid(True, alpha=0.3)
         
         # 4. Distance to nearest void distribution
@@ -343,11 +512,15 @@ class VCH001Analyzer:
                        fontsize=10, verticalalignment='top', fontfamily='monospace',
                        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray"))
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         plot_file = plots_dir / "vch001_analysis_results.png"
-        plt.savefig(plot_file, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.savefig(plot_file, dpi=300, bbox_inches='tight')
+        
+        # Release the pixel buffer and artists now rather than at the next GC cycle
+        fig.clf()
+        plt.close(fig)
+        gc.collect()
         
         print(f"📈 Analysis plots saved to: {plot_file}")
         return str(plot_file)
@@ -360,9 +533,7 @@ class VCH001Analyzer:
         
         # Run analysis pipeline
         self.load_and_prepare_data()
-        self.cross_match_positions()
-        self.classify_environments()
-        self.calculate_distance_residuals()
+        self.analyze_environments()
         self.test_environmental_correlation()
         plot_file = self.create_analysis_plots()
         
@@ -4,17 +4,71 @@ VCH-001 Parameter Optimization
 Test different thresholds and coverage restrictions to optimize significance
 """
 
+import itertools
+import os
+from contextlib import contextmanager, redirect_stdout
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 from vch001_analysis import VCH001Analyzer
 
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Minimum group sizes for a sweep result to count as valid
+MIN_VOID_SAMPLE = 20
+MIN_CLUSTER_SAMPLE = 50
+
+SWEEP_SN_COLUMNS = ['RA', 'DEC', 'zCMB', 'MU_SH0ES']
+SWEEP_VOID_COLUMNS = ['RA_deg', 'Dec_deg', 'redshift', 'radius_hMpc']
+
+# Result columns of one sweep run, in output order
+RESULT_DTYPES = {
+    'void_threshold_mpc': np.float64, 'max_redshift': np.float64, 'use_footprint': np.bool_,
+    'n_total': np.int64, 'n_void': np.int64, 'n_wall': np.int64, 'n_cluster': np.int64,
+    'median_void_distance': np.float64, 'median_angular_sep': np.float64,
+    't_statistic': np.float64, 'p_value': np.float64, 'cohens_d': np.float64, 'significant': np.bool_,
+    'void_mean': np.float64, 'void_sem': np.float64, 'wall_mean': np.float64, 'wall_sem': np.float64,
+    'cluster_mean': np.float64, 'cluster_sem': np.float64,
+}
+
+@contextmanager
+def _quiet():
+    """Discard the analyzer's progress prints (into os.devnull, without buffering them)"""
+    with open(os.devnull, 'w') as sink, redirect_stdout(sink):
+        yield
+
 class VCH001Optimizer:
     """Optimize VCH-001 analysis parameters for maximum significance"""
     
-    def __init__(self):
+    def __init__(self, n_jobs=-1, plots_dir="../plots"):
         self.results_history = []
+        self.n_jobs = n_jobs  # joblib workers for the sweep; 1 runs it in-process
+        self.plots_dir = Path(plots_dir)
+        self.plots_dir.mkdir(exist_ok=True)
+        self._sn_raw = None
+        self._void_raw = None
+    
+    def _prepare_shared_data(self):
+        """Load the SN and void catalogs once for every run of the sweep"""
+        if self._sn_raw is None:
+            loader = VCH001Analyzer().loader
+            # Only the columns the sweep reads are kept, so per-run copies and worker pickles stay small
+            self._sn_raw = loader.load_pantheon()[SWEEP_SN_COLUMNS]
+            self._void_raw = loader.load_vide_voids()[SWEEP_VOID_COLUMNS]
         
     def apply_sdss_footprint(self, sn_df, void_df):
         """Restrict analysis to SDSS DR7 footprint for better void-SN matching"""
@@ -25,17 +79,28 @@ class VCH001Optimizer:
         # South Galactic Cap: roughly 320° < RA < 60°, -30° < Dec < 5°
         
         # For simplicity, use the overlap region with void catalog
-        void_ra_min, void_ra_max = void_df['RA_deg'].min(), void_df['RA_deg'].max()
-        void_dec_min, void_dec_max = void_df['Dec_deg'].min(), void_df['Dec_deg'].max()
+        void_ra = void_df['RA_deg'].to_numpy()
+        void_dec = void_df['Dec_deg'].to_numpy()
+        void_ra_min, void_ra_max = np.nanmin(void_ra), np.nanmax(void_ra)
+        void_dec_min, void_dec_max = np.nanmin(void_dec), np.nanmax(void_dec)
         
         print(f"   Void catalog coverage: RA {void_ra_min:.1f}° - {void_ra_max:.1f}°")
         print(f"                         Dec {void_dec_min:.1f}° - {void_dec_max:.1f}°")
         
         # Apply footprint restriction to supernovae
-        sn_mask = ((sn_df['RA'] >= void_ra_min) & (sn_df['RA'] <= void_ra_max) &
-                   (sn_df['DEC'] >= void_dec_min) & (sn_df['DEC'] <= void_dec_max))
+        ra = sn_df['RA'].to_numpy()
+        dec = sn_df['DEC'].to_numpy()
+        if ne is not None:
+            # numexpr fuses the four comparisons into one pass over the arrays
+            sn_mask = ne.evaluate('(ra >= ra_min) & (ra <= ra_max) & (dec >= dec_min) & (dec <= dec_max)',
+                                  local_dict={'ra': ra, 'dec': dec,
+                                              'ra_min': void_ra_min, 'ra_max': void_ra_max,
+                                              'dec_min': void_dec_min, 'dec_max': void_dec_max})
+        else:
+            sn_mask = ((ra >= void_ra_min) & (ra <= void_ra_max) &
+                       (dec >= void_dec_min) & (dec <= void_dec_max))
         
-        sn_restricted = sn_df[sn_mask].copy()
+        sn_restricted = sn_df[sn_mask]
         
         print(f"   SNe before footprint cut: {len(sn_df)}")
         print(f"   SNe after footprint cut: {len(sn_restricted)}")
@@ -43,54 +108,132 @@ class VCH001Optimizer:
         
         return sn_restricted
     
+    def _param_sets(self):
+        """Yield one dict of analysis parameters per sweep run"""
+        # Parameter ranges to test
+        void_thresholds = [10.0, 15.0, 20.0, 25.0, 30.0]  # Mpc
+        redshift_maxes = [0.10, 0.11, 0.12, 0.13, 0.14, 0.15]
+        footprint_options = [False]  # Apply SDSS footprint restriction (disabled for now)
+        
+        for vt, zm, uf in itertools.product(void_thresholds, redshift_maxes, footprint_options):
+            yield {'void_threshold_mpc': vt, 'max_redshift': zm, 'use_footprint': uf}
+    
     def run_parameter_sweep(self):
         """Test different parameter combinations"""
         print("="*60)
         print("VCH-001 PARAMETER OPTIMIZATION")
         print("="*60)
         
-        # Parameter ranges to test
-        void_thresholds = [10.0, 15.0, 20.0, 25.0, 30.0]  # Mpc
-        redshift_maxes = [0.10, 0.11, 0.12, 0.13, 0.14, 0.15]
-        footprint_options = [False]  # Apply SDSS footprint restriction (disabled for now)
-        
-        results = []
+        self._prepare_shared_data()
         
-        total_runs = len(void_thresholds) * len(redshift_maxes) * len(footprint_options)
-        run_count = 0
+        param_sets = list(self._param_sets())
+        total_runs = len(param_sets)
         
-        for void_thresh in void_thresholds:
-            for z_max in redshift_maxes:
-                for use_footprint in footprint_options:
-                    run_count += 1
-                    print(f"\n--- Run {run_count}/{total_runs} ---")
-                    print(f"Parameters: void_thresh={void_thresh} Mpc, z_max={z_max}, footprint={use_footprint}")
-                    
-                    try:
-                        result = self.run_single_analysis(void_thresh, z_max, use_footprint)
-                        results.append(result)
-                        
-                        # Print quick summary
-                        if result['n_void'] > 0 and result['n_cluster'] > 0:
-                            print(f"   Result: p={result['p_value']:.4f}, n_void={result['n_void']}, n_cluster={result['n_cluster']}")
-                        else:
-                            print(f"   Result: Insufficient sample size")
-                            
-                    except Exception as e:
-                        print(f"   Error: {e}")
+        # The void threshold only changes the classification, so every redshift cut is
+        # matched once and shared by all thresholds; the cuts run in parallel when joblib is available
+        cuts = {}
+        for params in param_sets:
+            cuts.setdefault((params['max_redshift'], params['use_footprint']), []).append(params['void_threshold_mpc'])
+        if Parallel is not None and self.n_jobs != 1:
+            cut_results = Parallel(n_jobs=self.n_jobs, backend='loky')(
+                delayed(self._run_redshift_cut)(z_max, use_footprint, void_thresholds)
+                for (z_max, use_footprint), void_thresholds in cuts.items())
+        else:
+            cut_results = [self._run_redshift_cut(z_max, use_footprint, void_thresholds)
+                           for (z_max, use_footprint), void_thresholds in cuts.items()]
+        by_params = {(r['void_threshold_mpc'], r['max_redshift'], r['use_footprint']): r
+                     for group in cut_results for r in group}
+        combos = [(p['void_threshold_mpc'], p['max_redshift'], p['use_footprint']) for p in param_sets]
+        results = [by_params[combo] for combo in combos]
+        
+        # Struct-of-arrays result columns, preallocated and filled by run index
+        columns = {name: np.full(total_runs, np.nan) if dtype is np.float64 else np.zeros(total_runs, dtype=dtype)
+                   for name, dtype in RESULT_DTYPES.items()}
+        succeeded = np.zeros(total_runs, dtype=bool)
+        
+        for run_count, ((void_thresh, z_max, use_footprint), result) in enumerate(zip(combos, results), 1):
+            if 'error' not in result:
+                succeeded[run_count - 1] = True
+                for name, value in result.items():
+                    columns[name][run_count - 1] = value
+            
+            print(f"\n--- Run {run_count}/{total_runs} ---")
+            print(f"Parameters: void_thresh={void_thresh} Mpc, z_max={z_max}, footprint={use_footprint}")
+            
+            # Print quick summary
+            if 'error' in result:
+                print(f"   Error: {result['error']}")
+            elif result['n_void'] > 0 and result['n_cluster'] > 0 and not np.isnan(result['p_value']):
+                print(f"   Result: p={result['p_value']:.4f}, n_void={result['n_void']}, n_cluster={result['n_cluster']}")
+            else:
+                print(f"   Result: Insufficient sample size")
                         
-        self.results_df = pd.DataFrame(results)
+        self.results_df = pd.DataFrame({name: col[succeeded] for name, col in columns.items()})
+        self._compute_valid()
         return self.results_df
     
-    def run_single_analysis(self, void_threshold_mpc, max_redshift, use_footprint):
-        """Run single analysis with specified parameters"""
+    def _compute_valid(self):
+        """Cache the results with sufficient sample sizes and a defined p-value"""
+        n_void = self.results_df['n_void'].to_numpy()
+        n_cluster = self.results_df['n_cluster'].to_numpy()
+        p_value = self.results_df['p_value'].to_numpy(dtype=np.float64)
+        if ne is not None:
+            valid = ne.evaluate('(n_void >= min_void) & (n_cluster >= min_cluster) & (p_value == p_value)',
+                                local_dict={'n_void': n_void, 'n_cluster': n_cluster, 'p_value': p_value,
+                                            'min_void': MIN_VOID_SAMPLE, 'min_cluster': MIN_CLUSTER_SAMPLE})
+        else:
+            valid = (n_void >= MIN_VOID_SAMPLE) & (n_cluster >= MIN_CLUSTER_SAMPLE) & ~np.isnan(p_value)
+        self.valid_results = self.results_df[valid]
+        return self.valid_results
+    
+    def _run_redshift_cut(self, max_redshift, use_footprint, void_thresholds):
+        """Results for every void threshold at one redshift cut, sharing a single cross-match"""
+        def error(void_threshold_mpc, e):
+            return {'error': str(e), 'void_threshold_mpc': void_threshold_mpc,
+                    'max_redshift': max_redshift, 'use_footprint': use_footprint}
+        
+        try:
+            analyzer = self._prepare_analyzer(max_redshift, use_footprint)
+        except Exception as e:
+            return [error(vt, e) for vt in void_thresholds]
+        
+        # Group sizes follow from the shared match alone: the void count does not depend on the
+        # threshold, so infeasible thresholds are reported from counts without classifying or testing
+        sep = analyzer.matches_df['physical_sep_mpc'].to_numpy()
+        radius = analyzer.matches_df['void_radius_mpc'].to_numpy(dtype=np.float64)
+        n_void = np.count_nonzero(sep < radius)
         
-        # Create analyzer with custom parameters
+        results = []
+        for void_thresh in void_thresholds:
+            n_cluster = len(sep) - np.count_nonzero(sep < radius + void_thresh)
+            if n_void < MIN_VOID_SAMPLE or n_cluster < MIN_CLUSTER_SAMPLE:
+                results.append({
+                    'void_threshold_mpc': void_thresh,
+                    'max_redshift': max_redshift,
+                    'use_footprint': use_footprint,
+                    'n_total': len(sep),
+                    'n_void': n_void,
+                    'n_wall': len(sep) - n_void - n_cluster,
+                    'n_cluster': n_cluster,
+                    'median_void_distance': np.nanmedian(sep),
+                    'median_angular_sep': analyzer.matches_df['angular_sep_deg'].median(),
+                    'p_value': np.nan,
+                })
+                continue
+            try:
+                results.append(self._evaluate_threshold(analyzer, void_thresh, max_redshift, use_footprint))
+            except Exception as e:
+                results.append(error(void_thresh, e))
+        return results
+    
+    def _prepare_analyzer(self, max_redshift, use_footprint):
+        """Analyzer loaded, cross-matched and with residuals computed for one redshift cut"""
         analyzer = VCH001Analyzer()
-        analyzer.void_threshold_mpc = void_threshold_mpc
         analyzer.max_redshift = max_redshift
         
-        # Load data
+        # Reuse the catalogs loaded once for the sweep; the analyzer only reads them
+        if self._sn_raw is not None:
+            analyzer.set_data(self._sn_raw.copy(deep=False), self._void_raw.copy(deep=False))
         analyzer.load_and_prepare_data()
         
         # Apply footprint restriction if requested
@@ -100,28 +243,39 @@ class VCH001Optimizer:
                 raise ValueError("No SNe remaining after footprint cut")
             analyzer.sn_analysis = restricted_sn.reset_index(drop=True)
         
-        # Run analysis (suppress output)
-        import io
-        import sys
-        from contextlib import redirect_stdout
-        
-        with redirect_stdout(io.StringIO()):
+        # Threshold-independent steps (suppress output)
+        with _quiet():
             analyzer.cross_match_positions()
-            analyzer.classify_environments()
             analyzer.calculate_distance_residuals()
+        
+        return analyzer
+    
+    def run_single_analysis(self, void_threshold_mpc, max_redshift, use_footprint):
+        """Run single analysis with specified parameters"""
+        analyzer = self._prepare_analyzer(max_redshift, use_footprint)
+        return self._evaluate_threshold(analyzer, void_threshold_mpc, max_redshift, use_footprint)
+    
+    def _evaluate_threshold(self, analyzer, void_threshold_mpc, max_redshift, use_footprint):
+        """Classify and test a prepared analyzer at one void threshold"""
+        analyzer.void_threshold_mpc = void_threshold_mpc
+        
+        with _quiet():
+            analyzer.classify_environments()
             stats_results = analyzer.test_environmental_correlation()
         
         # Extract key results
-        env_counts = analyzer.sn_analysis['environment'].value_counts()
+        # environment is a Categorical over (void, wall, cluster), so counting is a bincount of its codes
+        codes = analyzer.sn_analysis['environment'].cat.codes.to_numpy()
+        n_void, n_wall, n_cluster = np.bincount(codes, minlength=3)
         
         result = {
             'void_threshold_mpc': void_threshold_mpc,
             'max_redshift': max_redshift,
             'use_footprint': use_footprint,
             'n_total': len(analyzer.sn_analysis),
-            'n_void': env_counts.get('void', 0),
-            'n_wall': env_counts.get('wall', 0), 
-            'n_cluster': env_counts.get('cluster', 0),
+            'n_void': n_void,
+            'n_wall': n_wall, 
+            'n_cluster': n_cluster,
             'median_void_distance': analyzer.sn_analysis['nearest_void_distance_mpc'].median(),
             'median_angular_sep': analyzer.matches_df['angular_sep_deg'].median(),
         }
@@ -159,20 +313,13 @@ class VCH001Optimizer:
         print(f"\n🎯 OPTIMIZATION RESULTS")
         print("="*50)
         
-        # Filter to valid results only
-        valid_results = self.results_df[
-            (self.results_df['n_void'] >= 20) & 
-            (self.results_df['n_cluster'] >= 50) &
-            (~self.results_df['p_value'].isna())
-        ].copy()
+        # Valid results only (filtered once after the sweep)
+        valid_results = self.valid_results
         
         if len(valid_results) == 0:
             print("❌ No valid results found with sufficient sample sizes")
             return None
         
-        # Sort by p-value (most significant first)
-        valid_results = valid_results.sort_values('p_value')
-        
         print(f"Valid parameter combinations: {len(valid_results)}")
         print(f"\nTop 5 most significant results:")
         print("-" * 80)
@@ -180,16 +327,21 @@ class VCH001Optimizer:
         cols = ['void_threshold_mpc', 'max_redshift', 'use_footprint', 
                 'n_void', 'n_cluster', 'p_value', 'cohens_d']
         
-        top_results = valid_results[cols].head()
-        for i, (idx, row) in enumerate(top_results.iterrows()):
-            sig_str = "***" if row['p_value'] < 0.001 else "**" if row['p_value'] < 0.01 else "*" if row['p_value'] < 0.05 else "ns"
-            print(f"{i+1}. void_thresh={row['void_threshold_mpc']:4.1f} z_max={row['max_redshift']:.2f} "
-                  f"footprint={str(row['use_footprint']):5s} | "
-                  f"n_void={row['n_void']:3.0f} n_cluster={row['n_cluster']:3.0f} | "
-                  f"p={row['p_value']:.4f} {sig_str} d={row['cohens_d']:.3f}")
+        # Partial selection of the most significant results; no full sort needed
+        top_results = valid_results.nsmallest(5, 'p_value')[cols]
+        display_df = top_results.assign(
+            significance=pd.cut(top_results['p_value'], [-np.inf, 0.001, 0.01, 0.05, np.inf],
+                                right=False, labels=['***', '**', '*', 'ns']))
+        display_df.index = pd.RangeIndex(1, len(display_df) + 1)
+        print(display_df.to_string(formatters={
+            'void_threshold_mpc': '{:.1f}'.format,
+            'max_redshift': '{:.2f}'.format,
+            'p_value': '{:.4f}'.format,
+            'cohens_d': '{:.3f}'.format,
+        }))
         
         # Get best result
-        best_result = valid_results.iloc[0]
+        best_result = valid_results.loc[valid_results['p_value'].idxmin()]
         
         print(f"\n🏆 OPTIMAL PARAMETERS:")
         print(f"   Void threshold: {best_result['void_threshold_mpc']} Mpc")
@@ -201,19 +353,11 @@ class VCH001Optimizer:
         
         return best_result
     
-    def create_optimization_plots(self):
-        """Create plots showing parameter optimization results"""
+    def create_optimization_plots(self, dpi=100, fmt='png'):
+        """Create plots showing parameter optimization results (fmt='pdf'/'svg' for vector output)"""
         print(f"\n📊 Creating optimization plots...")
         
-        plots_dir = Path("../plots")
-        plots_dir.mkdir(exist_ok=True)
-        
-        # Filter valid results
-        valid_results = self.results_df[
-            (self.results_df['n_void'] >= 20) & 
-            (self.results_df['n_cluster'] >= 50) &
-            (~self.results_df['p_value'].isna())
-        ].copy()
+        valid_results = self.valid_results
         
         if len(valid_results) == 0:
             print("❌ No valid results to plot")
@@ -264,13 +408,20 @@ class VCH001Optimizer:
         axes[1, 0].set_title('Effect Size vs Void Threshold')
         
         # 5. Parameter space heatmap (p-values)
-        pivot = valid_results.pivot_table(values='p_value', 
-                                        index='void_threshold_mpc', 
-                                        columns='max_redshift', 
-                                        aggfunc='mean')
-        im = axes[1, 1].imshow(pivot.values, aspect='auto', cmap='RdYlBu', 
-                              extent=[pivot.columns.min(), pivot.columns.max(),
-                                     pivot.index.min(), pivot.index.max()],
+        # The sweep is a Cartesian grid, so fill it directly (mean over footprint options)
+        vt = valid_results['void_threshold_mpc'].to_numpy()
+        zm = valid_results['max_redshift'].to_numpy()
+        vt_axis, zm_axis = np.unique(vt), np.unique(zm)
+        cell = (np.searchsorted(vt_axis, vt), np.searchsorted(zm_axis, zm))
+        p_sum = np.zeros((len(vt_axis), len(zm_axis)))
+        p_count = np.zeros_like(p_sum)
+        np.add.at(p_sum, cell, valid_results['p_value'].to_numpy())
+        np.add.at(p_count, cell, 1)
+        with np.errstate(invalid='ignore'):
+            grid = p_sum / p_count
+        im = axes[1, 1].imshow(grid, aspect='auto', cmap='RdYlBu', 
+                              extent=[zm_axis.min(), zm_axis.max(),
+                                     vt_axis.min(), vt_axis.max()],
                               origin='lower')
         axes[1, 1].set_xlabel('Max Redshift')
         axes[1, 1].set_ylabel('Void Threshold (Mpc)')
@@ -309,8 +460,12 @@ BEST RESULT:
         
         plt.tight_layout()
         
-        plot_file = plots_dir / "vch001_parameter_optimization.png"
-        plt.savefig(plot_file, dpi=300, bbox_inches='tight')
+        plot_file = self.plots_dir / f"vch001_parameter_optimization.{fmt}"
+        if fmt == 'png':
+            plt.savefig(plot_file, dpi=dpi, bbox_inches='tight')
+        else:
+            # Vector output skips rasterization entirely
+            plt.savefig(plot_file)
         plt.close()
         
         print(f"📈 Optimization plots saved to: {plot_file}")
@@ -326,16 +481,27 @@ def main():
     # Find optimal parameters
     best_params = optimizer.find_optimal_parameters()
     
-    # Create plots
-    plot_file = optimizer.create_optimization_plots()
+    # Create plots (VCH_PLOT=0 skips them for headless sweeps)
+    plot_file = None
+    if os.environ.get('VCH_PLOT', '1') == '1':
+        plot_file = optimizer.create_optimization_plots()
     
-    # Save results
+    # Save results (VCH_RESULTS_ZSTD=1 writes a zstd-compressed .csv.zst instead; needs zstandard)
     results_file = Path("../results/vch001_optimization_results.csv")
     results_file.parent.mkdir(exist_ok=True)
-    results_df.to_csv(results_file, index=False)
+    compress = os.environ.get('VCH_RESULTS_ZSTD', '0') == '1'
+    if compress and zstandard is None:
+        print("⚠️  VCH_RESULTS_ZSTD=1 but zstandard is not installed, writing plain CSV")
+        compress = False
+    if compress:
+        results_file = results_file.with_suffix('.csv.zst')
+        results_df.to_csv(results_file, index=False, compression={'method': 'zstd', 'level': 3})
+    else:
+        results_df.to_csv(results_file, index=False)
     
     print(f"\n💾 Results saved to: {results_file}")
-    print(f"📊 Plots saved to: {plot_file}")
+    if plot_file:
+        print(f"📊 Plots saved to: {plot_file}")
     
     return best_params, results_df
 
@@ -4,22 +4,83 @@ VCH-002 Analysis: Redshift Decomposition Environmental Correlation Testing
 Test whether supernova redshifts show systematic environmental dependence beyond distance effects
 """
 
+import hashlib
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy import stats
-from astropy.coordinates import SkyCoord
+from scipy.interpolate import CubicSpline
 from astropy import units as u
 from astropy.cosmology import Planck18
 from pathlib import Path
 
 from vch_common import VCHEnvironmentalClassifier, VCHStatisticalTester, VCHPlotManager, load_void_catalog, load_supernova_catalog
 
+# Above this many supernovae the detail scatters become a hexbin underlay plus a per-environment subsample
+SCATTER_MAX_POINTS = 5000
+SCATTER_SUBSAMPLE = 500
+DETAIL_PLOT_VERSION = 2  # Bump whenever the detailed plot's layout changes, so saved copies are redrawn
+
+# Results keys of the environment tests and how they are named in the summaries
+TEST_LABELS = [('redshift_residuals', 'redshift residuals'),
+               ('raw_redshift', 'raw redshift'),
+               ('implied_redshift', 'implied redshift')]
+
+# Setup notices already printed in this process; sweeps build one analyzer per parameter set
+_REPORTED = set()
+
+def _print_once(message):
+    """Print a setup notice only the first time it comes up in this process"""
+    if message not in _REPORTED:
+        _REPORTED.add(message)
+        print(message)
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+def _invert_monotonic(y, y_grid, x_grid):
+    """x such that y_grid(x) = y, by bracketing y in an increasing table and interpolating linearly"""
+    y = np.clip(y, y_grid[0], y_grid[-1])  # Clamp to the table ends, like np.interp
+    idx = np.clip(np.searchsorted(y_grid, y), 1, len(y_grid) - 1)
+    x0, x1 = x_grid[idx - 1], x_grid[idx]
+    y0, y1 = y_grid[idx - 1], y_grid[idx]
+    return x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+
+if njit is not None:
+    @njit('f8[::1](f8[::1], f8[::1], f8[::1], f8[:, ::1])', parallel=True, cache=True)
+    def _invert_spline(y, x_grid, y_grid, coeffs):
+        """x such that the cubic spline y(x) = y, by binary search for the knot interval and Newton steps"""
+        n = x_grid.shape[0]
+        out = np.empty(y.shape[0])
+        for i in prange(y.shape[0]):
+            yi = min(max(y[i], y_grid[0]), y_grid[n - 1])
+            lo, hi = 0, n - 1
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if y_grid[mid] <= yi:
+                    lo = mid
+                else:
+                    hi = mid
+            h = x_grid[hi] - x_grid[lo]
+            c0, c1, c2, c3 = coeffs[0, lo], coeffs[1, lo], coeffs[2, lo], coeffs[3, lo]
+            t = h * (yi - y_grid[lo]) / (y_grid[hi] - y_grid[lo])
+            for _ in range(3):
+                f = ((c0 * t + c1) * t + c2) * t + c3 - yi
+                t -= f / ((3.0 * c0 * t + 2.0 * c1) * t + c2)
+                t = min(max(t, 0.0), h)
+            out[i] = x_grid[lo] + t
+        return out
+else:
+    _invert_spline = None
+
 class VCH002Analyzer:
     """VCH-002 Redshift Decomposition Analysis"""
     
-    def __init__(self, cosmology=Planck18):
+    def __init__(self, cosmology=Planck18, spline_inversion=False):
         self.cosmology = cosmology
+        self.spline_inversion = spline_inversion
         self.results = {}
         
         # Analysis parameters (use optimized values from VCH-001)
@@ -32,6 +93,21 @@ class VCH002Analyzer:
         self.tester = VCHStatisticalTester()
         self.plotter = VCHPlotManager("VCH-002")
         
+        self._build_distance_table()
+        
+    def _build_distance_table(self):
+        """Tabulate luminosity distance on a redshift grid for inverting d_L(z)"""
+        self._z_grid = np.linspace(0.001, 0.5, 4000)
+        self._dl_grid = self.cosmology.luminosity_distance(self._z_grid).to(u.Mpc).value
+        _print_once(f"📐 Tabulated d_L(z) on {len(self._z_grid)} redshifts ({self._z_grid[0]} - {self._z_grid[-1]})")
+        
+        if self.spline_inversion:
+            if _invert_spline is None:
+                _print_once("⚠️  numba not installed, inverting d_L(z) by linear interpolation")
+                self.spline_inversion = False
+            else:
+                self._dl_coeffs = np.ascontiguousarray(CubicSpline(self._z_grid, self._dl_grid).c)
+    
     def load_and_prepare_data(self):
         """Load and prepare datasets for VCH-002 analysis"""
         print("=" * 60)
@@ -40,17 +116,18 @@ class VCH002Analyzer:
         
         # Load datasets using common functions
         print("Loading Pantheon+ supernovae...")
-        self.sn_df = load_supernova_catalog()
+        sn_df = load_supernova_catalog()
         
         print("Loading VoidFinder void catalog...")
-        self.void_df = load_void_catalog()
+        void_df = load_void_catalog()
         
-        # Apply redshift cuts
-        sn_mask = (self.sn_df['zCMB'] >= self.min_redshift) & (self.sn_df['zCMB'] <= self.max_redshift)
-        void_mask = (self.void_df['redshift'] >= self.min_redshift) & (self.void_df['redshift'] <= self.max_redshift)
+        # Apply redshift cuts; only the cut samples are kept on the analyzer,
+        # so the full catalogs are released when this method returns
+        sn_mask = (sn_df['zCMB'] >= self.min_redshift) & (sn_df['zCMB'] <= self.max_redshift)
+        void_mask = (void_df['redshift'] >= self.min_redshift) & (void_df['redshift'] <= self.max_redshift)
         
-        self.sn_analysis = self.sn_df[sn_mask].copy().reset_index(drop=True)
-        self.void_analysis = self.void_df[void_mask].copy().reset_index(drop=True)
+        self.sn_analysis = sn_df[sn_mask].copy().reset_index(drop=True)
+        self.void_analysis = void_df[void_mask].copy().reset_index(drop=True)
         
         print(f"✅ Analysis sample: {len(self.sn_analysis)} SNe, {len(self.void_analysis)} voids")
         print(f"   Redshift range: {self.min_redshift} - {self.max_redshift}")
@@ -62,19 +139,14 @@ class VCH002Analyzer:
         print(f"\\n🎯 VCH-002: CROSS-MATCHING POSITIONS")
         print("-" * 40)
         
-        # Create coordinate objects
-        sn_coords = SkyCoord(ra=self.sn_analysis['RA'].values*u.degree,
-                            dec=self.sn_analysis['DEC'].values*u.degree)
-        
-        void_coords = SkyCoord(ra=self.void_analysis['RA_deg'].values*u.degree, 
-                              dec=self.void_analysis['Dec_deg'].values*u.degree)
+        # Column arrays extracted once (read-only views, no copies)
+        sn = {col: self.sn_analysis[col].to_numpy() for col in ('RA', 'DEC', 'zCMB')}
+        voids = {col: self.void_analysis[col].to_numpy() for col in ('RA_deg', 'Dec_deg', 'redshift', 'radius_hMpc')}
         
-        # Use common cross-matching function
-        self.matches_df = self.classifier.cross_match_positions(
-            sn_coords, void_coords, 
-            self.sn_analysis['zCMB'].values,
-            self.void_analysis['redshift'].values,
-            self.void_analysis['radius_hMpc'].values
+        # Use common cross-matching function on plain RA/Dec arrays (no SkyCoord construction)
+        self.matches_df = self.classifier.cross_match_arrays(
+            sn['RA'], sn['DEC'], voids['RA_deg'], voids['Dec_deg'],
+            sn['zCMB'], voids['redshift'], voids['radius_hMpc']
         )
         
         return self.matches_df
@@ -83,14 +155,15 @@ class VCH002Analyzer:
         """Classify supernovae by environment using common classifier"""
         environments, env_counts = self.classifier.classify_environments(self.matches_df)
         
-        # Add classification to supernova dataframe
-        self.sn_analysis['environment'] = environments
+        # Add classification to supernova dataframe (categorical: masks and groupby work on int codes)
+        self.sn_analysis['environment'] = pd.Categorical(environments, categories=['void', 'wall', 'cluster'])
         
-        # Add matching information
-        self.sn_analysis['nearest_void_distance_mpc'] = self.matches_df['physical_sep_mpc']
-        self.sn_analysis['nearest_void_radius_mpc'] = self.matches_df['void_radius_mpc'] 
-        self.sn_analysis['redshift_to_void'] = self.matches_df['redshift_diff']
-        self.sn_analysis['void_threshold_mpc'] = self.void_threshold_mpc
+        # Matching information kept as plain arrays; added to the dataframe only when exported
+        self._match_arrays = {
+            'nearest_void_distance_mpc': self.matches_df['physical_sep_mpc'].to_numpy(),
+            'nearest_void_radius_mpc': self.matches_df['void_radius_mpc'].to_numpy(),
+            'redshift_to_void': self.matches_df['redshift_diff'].to_numpy(),
+        }
         
         return env_counts
     
@@ -101,30 +174,30 @@ class VCH002Analyzer:
         
         # Method 1: Distance-implied redshift vs observed redshift
         # Calculate what redshift should be based on observed distance modulus
-        observed_mu = self.sn_analysis['MU_SH0ES'].values
+        observed_mu = self.sn_analysis['MU_SH0ES'].to_numpy()
         
         # Convert distance modulus to luminosity distance
-        # μ = 5*log10(d_L/pc) - 5  =>  d_L = 10^((μ+5)/5) pc
-        observed_dl_pc = 10**((observed_mu + 5) / 5)
-        observed_dl_mpc = observed_dl_pc / 1e6
+        # μ = 5*log10(d_L/pc) - 5  =>  d_L = 10^((μ-25)/5) Mpc = exp(ln(10)/5 * (μ-25)) Mpc,
+        # evaluated in place in a single float64 buffer
+        observed_dl_mpc = np.subtract(observed_mu, 25.0, dtype=np.float64)
+        observed_dl_mpc *= np.log(10) / 5
+        np.exp(observed_dl_mpc, out=observed_dl_mpc)
         
         # Find redshift that would give this luminosity distance in ΛCDM
-        # This is the "distance-implied redshift"
-        implied_redshifts = []
-        for dl_mpc in observed_dl_mpc:
-            # Search for redshift that gives this distance
-            z_test = np.linspace(0.001, 0.5, 1000)
-            dl_test = self.cosmology.luminosity_distance(z_test).to(u.Mpc).value
-            
-            # Find closest match
-            closest_idx = np.argmin(np.abs(dl_test - dl_mpc))
-            implied_z = z_test[closest_idx]
-            implied_redshifts.append(implied_z)
-        
-        implied_redshifts = np.array(implied_redshifts)
+        # This is the "distance-implied redshift": d_L(z) is monotonic, so the table
+        # built with the analyzer is inverted for all supernovae by a binary search for the
+        # bracketing grid points and linear interpolation between them.
+        # Cost is O(N log M) for N supernovae on an M-point grid, with no cosmology calls here.
+        # With spline_inversion the grid is instead treated as a cubic spline and solved per
+        # supernova in a parallel numba kernel.
+        assert hasattr(self, '_dl_grid'), "distance table is built in __init__"
+        if self.spline_inversion:
+            implied_redshifts = _invert_spline(observed_dl_mpc, self._z_grid, self._dl_grid, self._dl_coeffs)
+        else:
+            implied_redshifts = _invert_monotonic(observed_dl_mpc, self._dl_grid, self._z_grid)
         
         # Calculate redshift residual: observed - distance-implied
-        observed_z = self.sn_analysis['zCMB'].values
+        observed_z = self.sn_analysis['zCMB'].to_numpy()
         redshift_residuals = observed_z - implied_redshifts
         
         self.sn_analysis['implied_redshift'] = implied_redshifts
@@ -141,37 +214,44 @@ class VCH002Analyzer:
         
         return redshift_residuals
     
+    def _group_by_environment(self):
+        """Split the analysis sample by environment once, for the tests and plots"""
+        self._env_groups = dict(tuple(self.sn_analysis.groupby('environment', observed=True, sort=False)))
+        return self._env_groups
+    
     def test_environmental_correlation(self):
         """Test correlation between environment and redshift residuals"""
         print(f"\\n📊 VCH-002: ENVIRONMENTAL REDSHIFT CORRELATION TESTING")
         print("=" * 60)
         
-        # Test 1: Redshift residuals by environment
-        void_residuals = self.sn_analysis[self.sn_analysis['environment'] == 'void']['redshift_residual']
-        cluster_residuals = self.sn_analysis[self.sn_analysis['environment'] == 'cluster']['redshift_residual']
+        self._group_by_environment()
         
+        # Count, mean and std of every tested column per environment in one grouped pass
+        moments = (self.sn_analysis
+                   .groupby('environment', observed=True)[['redshift_residual', 'raw_redshift', 'implied_redshift']]
+                   .agg(['count', 'mean', 'std']))
+        
+        def env_moments(env, column):
+            if env not in moments.index:
+                return 0, np.nan, np.nan
+            n, mean, std = moments.loc[env, column]
+            return int(n), mean, std
+        
+        def run_test(column, metric_name):
+            return self.tester.test_from_moments(
+                env_moments('void', column), env_moments('cluster', column), metric_name)
+        
+        # Test 1: Redshift residuals by environment
         print("\\n🔬 TEST 1: Redshift Residuals (Observed - Distance-Implied)")
-        residual_results = self.tester.test_environmental_correlation(
-            void_residuals, cluster_residuals, "redshift residuals"
-        )
+        residual_results = run_test('redshift_residual', "redshift residuals")
         
         # Test 2: Raw redshift comparison by environment
-        void_raw_z = self.sn_analysis[self.sn_analysis['environment'] == 'void']['raw_redshift']
-        cluster_raw_z = self.sn_analysis[self.sn_analysis['environment'] == 'cluster']['raw_redshift']
-        
         print("\\n🔬 TEST 2: Raw Redshift Environmental Comparison")
-        raw_z_results = self.tester.test_environmental_correlation(
-            void_raw_z, cluster_raw_z, "raw redshift"
-        )
+        raw_z_results = run_test('raw_redshift', "raw redshift")
         
         # Test 3: Distance-implied redshift by environment
-        void_implied_z = self.sn_analysis[self.sn_analysis['environment'] == 'void']['implied_redshift']
-        cluster_implied_z = self.sn_analysis[self.sn_analysis['environment'] == 'cluster']['implied_redshift']
-        
         print("\\n🔬 TEST 3: Distance-Implied Redshift Environmental Comparison")
-        implied_z_results = self.tester.test_environmental_correlation(
-            void_implied_z, cluster_implied_z, "distance-implied redshift"
-        )
+        implied_z_results = run_test('implied_redshift', "distance-implied redshift")
         
         # Store all results
         self.results = {
@@ -184,13 +264,7 @@ class VCH002Analyzer:
         print(f"\\n🎯 VCH-002 HYPOTHESIS ASSESSMENT:")
         print("=" * 50)
         
-        significant_tests = []
-        if residual_results and residual_results['statistical_test']['significant']:
-            significant_tests.append("redshift residuals")
-        if raw_z_results and raw_z_results['statistical_test']['significant']:
-            significant_tests.append("raw redshift")
-        if implied_z_results and implied_z_results['statistical_test']['significant']:
-            significant_tests.append("implied redshift")
+        significant_tests = self._significant_tests()
         
         if significant_tests:
             print(f"✅ SIGNIFICANT environmental correlation found in: {', '.join(significant_tests)}")
@@ -201,13 +275,21 @@ class VCH002Analyzer:
         
         return self.results
     
-    def create_analysis_plots(self):
+    def _significant_tests(self):
+        """Labels of the environment tests that came out significant"""
+        return [label for key, label in TEST_LABELS
+                if self.results.get(key) and self.results[key]['statistical_test']['significant']]
+    
+    def create_analysis_plots(self, dpi=150, force=False):
         """Create comprehensive VCH-002 analysis plots"""
         print(f"\\n📊 VCH-002: CREATING ANALYSIS PLOTS")
         print("-" * 40)
         
-        # Prepare data for plotting
-        self.sn_analysis['redshift'] = self.sn_analysis['zCMB']  # For compatibility
+        # Prepare data for plotting: export the matching arrays in one assign
+        self.sn_analysis = self.sn_analysis.assign(
+            redshift=self.sn_analysis['zCMB'],  # For compatibility
+            void_threshold_mpc=self.void_threshold_mpc,
+            **self._match_arrays)
         
         # Create standard environmental analysis plots for redshift residuals
         plot_file = self.plotter.create_environmental_analysis_plots(
@@ -216,25 +298,55 @@ class VCH002Analyzer:
         )
         
         # Create additional VCH-002 specific plots
-        self.create_vch002_specific_plots()
+        self.create_vch002_specific_plots(dpi=dpi, force=force)
         
         return plot_file
     
-    def create_vch002_specific_plots(self):
-        """Create VCH-002 specific analysis plots"""
+    def _environment_scatter(self, ax, env_groups, x, y, colors, alpha, with_counts=False):
+        """Scatter y against x per environment, density-binned for large samples"""
+        dense = len(self.sn_analysis) > SCATTER_MAX_POINTS
+        if dense:
+            ax.hexbin(self.sn_analysis[x], self.sn_analysis[y], gridsize=60, mincnt=1, cmap='Greys')
+        for env, sub in env_groups:
+            label = f'{env.capitalize()} ({len(sub)})' if with_counts else env.capitalize()
+            if dense and len(sub) > SCATTER_SUBSAMPLE:
+                sub = sub.sample(SCATTER_SUBSAMPLE, random_state=0)
+            ax.scatter(sub[x], sub[y], c=colors[env], label=label, alpha=alpha, s=20)
+    
+    def _detail_plot_key(self, dpi):
+        """Hash of everything the detailed plot shows, to tell whether a saved copy is current"""
+        key = hashlib.blake2b(f"v{DETAIL_PLOT_VERSION}|{self.void_threshold_mpc}|{dpi}|{len(self.sn_analysis)}".encode())
+        for col in ('implied_redshift', 'raw_redshift', 'redshift_residual', 'MU_SH0ES'):
+            key.update(np.ascontiguousarray(self.sn_analysis[col].to_numpy()).tobytes())
+        key.update(np.ascontiguousarray(self.sn_analysis['environment'].cat.codes.to_numpy()).tobytes())
+        key.update(np.ascontiguousarray(self._match_arrays['nearest_void_distance_mpc']).tobytes())
+        for name, result in self.results.items():
+            if result:
+                test = result['statistical_test']
+                key.update(f"{name}|{test['p_value']!r}|{test['cohens_d']!r}".encode())
+        return key.hexdigest()
+    
+    def create_vch002_specific_plots(self, dpi=150, force=False):
+        """Create VCH-002 specific analysis plots (skipped when an identical plot is already saved)"""
+        plot_file = self.plotter.plots_dir / "vch002_detailed_analysis.png"
+        key_file = plot_file.with_suffix('.key')
+        plot_key = self._detail_plot_key(dpi)
+        if not force and plot_file.exists() and key_file.exists() and key_file.read_text() == plot_key:
+            print(f"📈 Detailed VCH-002 plots up to date: {plot_file}")
+            return str(plot_file)
+        
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
         fig.suptitle('VCH-002 Redshift Decomposition Analysis: Detailed Results', fontsize=16)
         
         colors = {'void': 'red', 'wall': 'orange', 'cluster': 'blue'}
         
+        # Environment subsets from the split shared with the statistical tests
+        env_groups = [(env, self._env_groups[env]) for env in ['void', 'wall', 'cluster']
+                      if env in self._env_groups]
+        
         # 1. Observed vs Distance-Implied Redshift
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                axes[0, 0].scatter(self.sn_analysis[mask]['implied_redshift'],
-                                 self.sn_analysis[mask]['raw_redshift'],
-                                 c=colors[env], label=f'{env.capitalize()} ({mask.sum()})',
-                                 alpha=0.7, s=20)
+        self._environment_scatter(axes[0, 0], env_groups, 'implied_redshift', 'raw_redshift',
+                                  colors, alpha=0.7, with_counts=True)
         
         # Add 1:1 line
         z_range = [self.sn_analysis['implied_redshift'].min(), self.sn_analysis['implied_redshift'].max()]
@@ -246,13 +358,8 @@ class VCH002Analyzer:
         axes[0, 0].grid(True, alpha=0.3)
         
         # 2. Redshift residuals vs observed redshift
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                axes[0, 1].scatter(self.sn_analysis[mask]['raw_redshift'],
-                                 self.sn_analysis[mask]['redshift_residual'],
-                                 c=colors[env], label=env.capitalize(),
-                                 alpha=0.6, s=20)
+        self._environment_scatter(axes[0, 1], env_groups, 'raw_redshift', 'redshift_residual',
+                                  colors, alpha=0.6)
         axes[0, 1].axhline(0, color='black', linestyle='--', alpha=0.5)
         axes[0, 1].set_xlabel('Observed Redshift')
         axes[0, 1].set_ylabel('Redshift Residual')
@@ -263,11 +370,9 @@ class VCH002Analyzer:
         # 3. Redshift residual distribution by environment
         env_residuals = []
         env_labels = []
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                env_residuals.append(self.sn_analysis[mask]['redshift_residual'])
-                env_labels.append(f'{env.capitalize()}\\n(n={mask.sum()})')
+        for env, sub in env_groups:
+            env_residuals.append(sub['redshift_residual'])
+            env_labels.append(f'{env.capitalize()}\\n(n={len(sub)})')
         
         if env_residuals:
             axes[0, 2].boxplot(env_residuals, labels=env_labels)
@@ -277,13 +382,8 @@ class VCH002Analyzer:
             axes[0, 2].grid(True, alpha=0.3)
         
         # 4. Raw redshift vs distance modulus colored by environment
-        for env in ['void', 'wall', 'cluster']:
-            mask = self.sn_analysis['environment'] == env
-            if mask.sum() > 0:
-                axes[1, 0].scatter(self.sn_analysis[mask]['MU_SH0ES'],
-                                 self.sn_analysis[mask]['raw_redshift'],
-                                 c=colors[env], label=env.capitalize(),
-                                 alpha=0.6, s=20)
+        self._environment_scatter(axes[1, 0], env_groups, 'MU_SH0ES', 'raw_redshift',
+                                  colors, alpha=0.6)
         axes[1, 0].set_xlabel('Distance Modulus')
         axes[1, 0].set_ylabel('Observed Redshift')
         axes[1, 0].set_title('Redshift vs Distance Modulus')
@@ -291,9 +391,14 @@ class VCH002Analyzer:
         axes[1, 0].grid(True, alpha=0.3)
         
         # 5. Redshift residuals vs void distance
-        axes[1, 1].scatter(self.sn_analysis['nearest_void_distance_mpc'],
-                          self.sn_analysis['redshift_residual'], 
-                          alpha=0.6, s=20, c='purple')
+        if len(self.sn_analysis) > SCATTER_MAX_POINTS:
+            axes[1, 1].hexbin(self._match_arrays['nearest_void_distance_mpc'],
+                              self.sn_analysis['redshift_residual'],
+                              gridsize=60, mincnt=1, cmap='Purples')
+        else:
+            axes[1, 1].scatter(self._match_arrays['nearest_void_distance_mpc'],
+                              self.sn_analysis['redshift_residual'], 
+                              alpha=0.6, s=20, c='purple')
         axes[1, 1].axhline(0, color='black', linestyle='--', alpha=0.5)
         axes[1, 1].axvline(self.void_threshold_mpc, color='red', linestyle='--', alpha=0.5)
         axes[1, 1].set_xlabel('Distance to Nearest Void (Mpc)')
@@ -336,14 +441,15 @@ class VCH002Analyzer:
         
         plt.tight_layout()
         
-        plot_file = self.plotter.plots_dir / "vch002_detailed_analysis.png"
-        plt.savefig(plot_file, dpi=300, bbox_inches='tight')
+        # Tight bbox keeps the summary text box, which overflows its panel, in the saved image
+        plt.savefig(plot_file, dpi=dpi, bbox_inches='tight')
         plt.close()
+        key_file.write_text(plot_key)
         
         print(f"📈 Detailed VCH-002 plots saved to: {plot_file}")
         return str(plot_file)
     
-    def run_full_analysis(self):
+    def run_full_analysis(self, dpi=150, force=False):
         """Run complete VCH-002 analysis pipeline"""
         print("\\n" + "=" * 60)
         print("VCH-002 REDSHIFT DECOMPOSITION ANALYSIS")
@@ -355,7 +461,7 @@ class VCH002Analyzer:
         self.classify_environments()
         self.calculate_redshift_residuals()
         self.test_environmental_correlation()
-        plot_file = self.create_analysis_plots()
+        plot_file = self.create_analysis_plots(dpi=dpi, force=force)
         
         # Final summary
         print("\\n" + "=" * 60)
@@ -363,10 +469,7 @@ class VCH002Analyzer:
         print("=" * 60)
         
         # Count significant results
-        significant_tests = []
-        for test_name, result in self.results.items():
-            if result and result['statistical_test']['significant']:
-                significant_tests.append(test_name)
+        significant_tests = self._significant_tests()
         
         if significant_tests:
             print("🎉 RESULT: Significant environmental redshift correlations detected!")
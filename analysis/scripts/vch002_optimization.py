@@ -86,7 +86,7 @@ class VCH002Optimizer:
             'n_void': env_counts.get('void', 0),
             'n_wall': env_counts.get('wall', 0), 
             'n_cluster': env_counts.get('cluster', 0),
-            'median_void_distance': analyzer.sn_analysis['nearest_void_distance_mpc'].median(),
+            'median_void_distance': analyzer.matches_df['physical_sep_mpc'].median(),
             'median_angular_sep': analyzer.matches_df['angular_sep_deg'].median(),
         }
         
@@ -4,15 +4,29 @@ VCH Common Utilities
 Shared functions and classes for VCH analysis modules
 """
 
+import functools
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+from itertools import islice
 import numpy as np
 import pandas as pd
 from scipy import stats
+from scipy.spatial import cKDTree
 from astropy.coordinates import SkyCoord
 from astropy import units as u
 from astropy.cosmology import Planck18
 from pathlib import Path
 import matplotlib.pyplot as plt
 
+def _unit_vectors(ra_deg, dec_deg):
+    """Unit vectors on the sphere for RA/Dec given in degrees"""
+    ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.column_stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+
 class VCHEnvironmentalClassifier:
     """Shared environmental classification system for all VCH modules"""
     
@@ -22,40 +36,38 @@ class VCHEnvironmentalClassifier:
         
     def cross_match_positions(self, object_coords, void_coords, object_redshifts, void_redshifts, void_radii):
         """Cross-match object positions with void catalog"""
-        print(f"Cross-matching {len(object_coords)} objects with {len(void_coords)} voids...")
-        
-        matches = []
-        for i, obj_coord in enumerate(object_coords):
-            # Calculate angular separations to all voids
-            separations = obj_coord.separation(void_coords)
-            
-            # Find nearest void
-            min_idx = np.argmin(separations)
-            min_separation = separations[min_idx]
-            
-            # Calculate physical distance using redshift
-            obj_z = object_redshifts[i]
-            void_z = void_redshifts[min_idx]
-            avg_z = (obj_z + void_z) / 2
-            
-            # Convert angular to physical distance (Mpc)
-            angular_distance = self.cosmology.angular_diameter_distance(avg_z)
-            physical_separation = (min_separation.radian * angular_distance).to(u.Mpc).value
-            
-            # Void properties
-            void_radius = void_radii[min_idx] * 0.67  # Convert h^-1 Mpc to Mpc (h~0.67)
-            
-            matches.append({
-                'object_idx': i,
-                'void_idx': min_idx,
-                'angular_sep_deg': min_separation.degree,
-                'physical_sep_mpc': physical_separation,
-                'void_radius_mpc': void_radius,
-                'void_redshift': void_z,
-                'redshift_diff': abs(obj_z - void_z)
-            })
-        
-        matches_df = pd.DataFrame(matches)
+        return self.cross_match_arrays(object_coords.ra.deg, object_coords.dec.deg,
+                                       void_coords.ra.deg, void_coords.dec.deg,
+                                       object_redshifts, void_redshifts, void_radii)
+    
+    def cross_match_arrays(self, object_ra, object_dec, void_ra, void_dec, object_redshifts, void_redshifts, void_radii):
+        """Cross-match objects with the void catalog from RA/Dec arrays in degrees"""
+        print(f"Cross-matching {len(object_ra)} objects with {len(void_ra)} voids...")
+        
+        # Nearest void for every object in one k-d tree query; chord length on the
+        # unit sphere is monotonic in angular separation
+        obj_xyz = _unit_vectors(object_ra, object_dec)
+        void_xyz = _unit_vectors(void_ra, void_dec)
+        chord, void_idx = cKDTree(void_xyz).query(obj_xyz, k=1)
+        sep_rad = 2 * np.arcsin(np.minimum(chord / 2, 1.0))
+        
+        # Calculate physical distance using redshift
+        object_redshifts = np.asarray(object_redshifts)
+        void_z = np.asarray(void_redshifts)[void_idx]
+        avg_z = (object_redshifts + void_z) / 2
+        
+        # Convert angular to physical distance (Mpc), one batched cosmology call
+        angular_distance = self.cosmology.angular_diameter_distance(avg_z).to(u.Mpc).value
+        
+        matches_df = pd.DataFrame({
+            'object_idx': np.arange(len(void_idx)),
+            'void_idx': void_idx,
+            'angular_sep_deg': np.degrees(sep_rad),
+            'physical_sep_mpc': sep_rad * angular_distance,
+            'void_radius_mpc': np.asarray(void_radii)[void_idx] * 0.67,  # Convert h^-1 Mpc to Mpc (h~0.67)
+            'void_redshift': void_z,
+            'redshift_diff': np.abs(object_redshifts - void_z)
+        })
         
         print(f"✅ Cross-matching complete!")
         print(f"   Median angular separation: {matches_df['angular_sep_deg'].median():.2f}°")
@@ -101,26 +113,43 @@ class VCHStatisticalTester:
             print("❌ Insufficient sample sizes for statistical testing")
             return None
         
-        # Basic statistics
-        void_mean = np.mean(void_values)
-        void_std = np.std(void_values)
-        void_sem = void_std / np.sqrt(len(void_values))
+        return VCHStatisticalTester.test_from_moments(
+            (len(void_values), np.mean(void_values), np.std(void_values, ddof=1)),
+            (len(cluster_values), np.mean(cluster_values), np.std(cluster_values, ddof=1)),
+            metric_name, print_header=False)
+    
+    @staticmethod
+    def test_from_moments(void_moments, cluster_moments, metric_name="values", equal_var=True, print_header=True):
+        """Environmental correlation test from per-environment (count, mean, sample std)"""
+        if print_header:
+            print(f"📊 STATISTICAL CORRELATION ANALYSIS ({metric_name})")
+            print("-" * 50)
+        
+        n_void, void_mean, void_sample_std = void_moments
+        n_cluster, cluster_mean, cluster_sample_std = cluster_moments
+        if n_void == 0 or n_cluster == 0:
+            print("❌ Insufficient sample sizes for statistical testing")
+            return None
         
-        cluster_mean = np.mean(cluster_values)
-        cluster_std = np.std(cluster_values)
-        cluster_sem = cluster_std / np.sqrt(len(cluster_values))
+        # Basic statistics (reported std and sem use the population std)
+        void_std = void_sample_std * np.sqrt((n_void - 1) / n_void) if n_void > 1 else 0.0
+        cluster_std = cluster_sample_std * np.sqrt((n_cluster - 1) / n_cluster) if n_cluster > 1 else 0.0
+        void_sem = void_std / np.sqrt(n_void)
+        cluster_sem = cluster_std / np.sqrt(n_cluster)
         
         print(f"Environmental {metric_name} statistics:")
-        print(f"   Void: {void_mean:.4f} ± {void_sem:.4f} ({len(void_values)} objects)")
-        print(f"   Cluster: {cluster_mean:.4f} ± {cluster_sem:.4f} ({len(cluster_values)} objects)")
+        print(f"   Void: {void_mean:.4f} ± {void_sem:.4f} ({n_void} objects)")
+        print(f"   Cluster: {cluster_mean:.4f} ± {cluster_sem:.4f} ({n_cluster} objects)")
         
         # Two-sample t-test
-        t_stat, p_value = stats.ttest_ind(void_values, cluster_values)
+        t_stat, p_value = stats.ttest_ind_from_stats(void_mean, void_sample_std, n_void,
+                                                     cluster_mean, cluster_sample_std, n_cluster,
+                                                     equal_var=equal_var)
         
         # Effect size (Cohen's d)
-        pooled_std = np.sqrt(((len(void_values)-1)*void_std**2 + 
-                             (len(cluster_values)-1)*cluster_std**2) / 
-                            (len(void_values) + len(cluster_values) - 2))
+        pooled_std = np.sqrt(((n_void-1)*void_std**2 + 
+                             (n_cluster-1)*cluster_std**2) / 
+                            (n_void + n_cluster - 2))
         cohens_d = abs(void_mean - cluster_mean) / pooled_std
         
         # Significance level
@@ -152,13 +181,13 @@ class VCHStatisticalTester:
             
         return {
             'void': {
-                'count': len(void_values),
+                'count': n_void,
                 'mean': void_mean,
                 'std': void_std,
                 'sem': void_sem
             },
             'cluster': {
-                'count': len(cluster_values), 
+                'count': n_cluster, 
                 'mean': cluster_mean,
                 'std': cluster_std,
                 'sem': cluster_sem
@@ -299,4 +328,33 @@ def load_supernova_catalog():
     """Shared supernova catalog loading function"""  
     from data_loader import VCH001DataLoader
     loader = VCH001DataLoader()
-    return loader.load_pantheon()
\ No newline at end of file
+    return loader.load_pantheon()
+
+@functools.lru_cache(maxsize=1)
+def scan_simulation_dirs(root='../../datasets/simulations', names=('millennium', 'illustris', 'eagle'), n_head=3):
+    """Map each simulation directory to (file count, [(name, size) of first n_head files]), or None if missing"""
+    # Scanned once per process and shared by the investigation and validation reports;
+    # only the first few entries are kept, so memory stays constant for large snapshot dirs
+    scan = {}
+    for name in names:
+        try:
+            with os.scandir(os.path.join(root, name)) as it:
+                files = (e for e in it if e.is_file())
+                head = [(e.name, e.stat(follow_symlinks=False).st_size) for e in islice(files, n_head)]
+                scan[name] = (len(head) + sum(1 for _ in files), head)
+        except FileNotFoundError:
+            scan[name] = None
+    return scan
+
+def buffered_output(func):
+    """Collect everything a report function prints and write it to stdout in one call"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        buffer = io.StringIO()
+        try:
+            with redirect_stdout(buffer):
+                return func(*args, **kwargs)
+        finally:
+            # Flush whatever was produced even if the report raised
+            sys.stdout.write(buffer.getvalue())
+    return wrapper
\ No newline at end of file